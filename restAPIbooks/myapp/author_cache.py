@@ -0,0 +1,168 @@
+import threading
+import uuid
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+
+from myapp.models import Author
+
+# Значение для отсутствующего автора: (имя, существует)
+MISSING = (None, False)
+
+# Версия авторов в общем кеше: увеличивается при каждом изменении автора
+SHARED_VERSION_KEY = 'author_cache_version'
+
+
+class AuthorLookupCache:
+    """
+    Ограниченный LRU-кеш id автора -> (имя, существует) в памяти процесса.
+
+    Используется при проверке author_id, создании книг и выводе имени автора.
+    Записи сбрасываются сигналами сохранения и удаления Author (см. myapp.signals).
+
+    Если задан AUTHOR_CACHE_SHARED_CACHE, изменения авторов увеличивают версию
+    в этом общем кеше, и каждый процесс сбрасывает свои записи, увидев новую версию.
+    Так кеши нескольких рабочих процессов и узлов остаются согласованными. Версия
+    читается не при каждом обращении, а один раз за запрос (см. mark_shared_version_stale):
+    список из сотен книг не должен читать файл общего кеша для каждой строки.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        # Увеличивается при каждом сбросе, чтобы не сохранять в кеш результат
+        # запроса, начатого до изменения автора
+        self._generation = 0
+        self._shared_version = None
+        self._shared_version_stale = True
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def maxsize(self):
+        return settings.AUTHOR_CACHE_SIZE
+
+    @staticmethod
+    def _key(author_id):
+        return author_id if isinstance(author_id, uuid.UUID) else uuid.UUID(str(author_id))
+
+    def get(self, author_id):
+        """Возвращает (имя, существует) для одного автора."""
+        return self.get_many([author_id])[self._key(author_id)]
+
+    def exists(self, author_id):
+        return self.get(author_id)[1]
+
+    def name(self, author_id):
+        return self.get(author_id)[0]
+
+    def get_many(self, author_ids):
+        """
+        Возвращает словарь id -> (имя, существует).
+        Все отсутствующие в кеше авторы загружаются одним запросом.
+        """
+        keys = {self._key(author_id) for author_id in author_ids}
+        if self._shared_version_stale:
+            self._sync_shared_version()
+        found = {}
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._entries.move_to_end(key)
+                    found[key] = self._entries[key]
+            self.hits += len(found)
+            self.misses += len(keys) - len(found)
+            generation = self._generation
+
+        missing = keys - found.keys()
+        if missing:
+            loaded = dict.fromkeys(missing, MISSING)
+            for author_id, name in Author.objects.filter(id__in=missing).values_list('id', 'name'):
+                loaded[author_id] = (name, True)
+            self._store(loaded, generation)
+            found.update(loaded)
+        return found
+
+    def _store(self, entries, generation):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries.update(entries)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, author_id):
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(self._key(author_id), None)
+        self._bump_shared_version()
+
+    def mark_shared_version_stale(self):
+        """
+        Просит перечитать версию из общего кеша при следующем обращении.
+        Вызывается в начале каждого запроса (см. myapp.signals).
+        """
+        self._shared_version_stale = True
+
+    def _sync_shared_version(self):
+        """Сбрасывает локальные записи, если авторы изменились в другом процессе."""
+        alias = settings.AUTHOR_CACHE_SHARED_CACHE
+        if alias is None:
+            return
+        # Флаг снимается до чтения: запрос, начавшийся раньше, увидит эту или более новую версию
+        self._shared_version_stale = False
+        version = caches[alias].get(SHARED_VERSION_KEY)
+        with self._lock:
+            if version != self._shared_version:
+                self._generation += 1
+                self._entries.clear()
+                self._shared_version = version
+
+    def _bump_shared_version(self):
+        alias = settings.AUTHOR_CACHE_SHARED_CACHE
+        if alias is None:
+            return
+        # Свою версию не запоминаем: если другой процесс увеличил её одновременно,
+        # следующее чтение всё равно увидит расхождение и сбросит кеш
+        shared = caches[alias]
+        shared.add(SHARED_VERSION_KEY, 0, timeout=None)
+        try:
+            shared.incr(SHARED_VERSION_KEY)
+        except ValueError:
+            # Ключ вытеснен из кеша между add и incr
+            shared.set(SHARED_VERSION_KEY, 1, timeout=None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def prewarm(self):
+        """Загружает в кеш до maxsize авторов одним запросом."""
+        self._sync_shared_version()
+        with self._lock:
+            generation = self._generation
+        authors = Author.objects.order_by().values_list('id', 'name')[:self.maxsize]
+        self._store({author_id: (name, True) for author_id, name in authors}, generation)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+author_cache = AuthorLookupCache()
+
+
+def prewarm_author_cache():
+    """Прогревает кеш авторов при старте рабочего процесса, если это включено в настройках."""
+    if settings.AUTHOR_CACHE_PREWARM:
+        author_cache.prewarm()
@@ -0,0 +1,42 @@
+import fcntl
+import os
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.filebased import FileBasedCache
+
+
+class LockedFileBasedCache(FileBasedCache):
+    """
+    Файловый кеш с атомарными add() и incr() для нескольких процессов.
+
+    В FileBasedCache эти операции состоят из чтения и записи, и два процесса могут
+    выполнить их одновременно: оба выиграют add() ключа идемпотентности или
+    потеряют одно из увеличений. Здесь они выполняются под блокировкой flock на
+    файле в каталоге кеша. Та же блокировка доступна через exclusive() для своих
+    операций чтения-изменения-записи (корзины троттлинга).
+
+    flock надёжен для процессов одного узла с локальным каталогом кеша. Для
+    нескольких узлов нужен кеш с собственными атомарными операциями (Redis, Memcached).
+    """
+    lock_filename = 'cache.lock'
+
+    @contextmanager
+    def exclusive(self):
+        self._createdir()
+        # Файл открывается заново при каждом вызове: блокировки flock на разных
+        # открытых файлах исключают друг друга и между потоками одного процесса
+        with open(os.path.join(self._dir, self.lock_filename), 'a') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        with self.exclusive():
+            return super().add(key, value, timeout, version)
+
+    def incr(self, key, delta=1, version=None):
+        with self.exclusive():
+            return super().incr(key, delta, version)
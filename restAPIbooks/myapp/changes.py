@@ -0,0 +1,19 @@
+from myapp.models import ChangeLogEntry
+
+
+def record_change(entity, object_id, action, data=None):
+    """Добавляет запись в журнал изменений (вызывается в транзакции изменения)."""
+    return ChangeLogEntry.objects.create(
+        entity=entity,
+        object_id=object_id,
+        action=action,
+        data=data
+    )
+
+
+def record_deletions(entity, object_ids):
+    """Добавляет в журнал записи об удалении нескольких объектов одним запросом."""
+    ChangeLogEntry.objects.bulk_create([
+        ChangeLogEntry(entity=entity, object_id=object_id, action=ChangeLogEntry.ACTION_DELETE)
+        for object_id in object_ids
+    ])
@@ -0,0 +1,160 @@
+import logging
+import math
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from functools import partial
+
+from django.conf import settings
+from django.db import connection, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from myapp.throttling import ServiceOverloaded, record_shed
+
+logger = logging.getLogger(__name__)
+
+
+class WriteOutcomeUnknown(APIException):
+    """
+    Запись уже выполняется, но не завершилась за отведённое время. Повторять запрос
+    небезопасно (он может выполниться дважды), поэтому ответ без Retry-After.
+    """
+    status_code = status.HTTP_504_GATEWAY_TIMEOUT
+    default_detail = 'The write did not finish in time, its outcome is unknown.'
+    default_code = 'write_outcome_unknown'
+
+
+class WriteCoalescer:
+    """
+    Объединяет записи из разных запросов в групповые транзакции.
+
+    Запросы передают функцию записи в очередь и ждут результата. Фоновый поток
+    собирает до WRITE_COALESCING_BATCH_SIZE функций или ждёт не дольше
+    WRITE_COALESCING_DELAY секунд и выполняет их в одной транзакции, каждую
+    в своей точке сохранения. Так на группу приходится одна фиксация (и один fsync
+    в SQLite), а ошибка одной записи не отменяет остальные. Запрос получает
+    результат только после фиксации группы.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = None
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.writes = 0
+
+    def submit(self, func, *args):
+        """
+        Выполняет func(*args) в ближайшей групповой транзакции и возвращает результат.
+        Если результата нет за WRITE_COALESCING_TIMEOUT секунд, возвращает 503, когда
+        запись удалось отменить, и 504 без Retry-After, когда она уже выполняется.
+        """
+        future = Future()
+        self._ensure_started().put((partial(func, *args), future))
+        timeout = settings.WRITE_COALESCING_TIMEOUT
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            # Запись ещё не начата: отменяем её, и клиент может безопасно повторить запрос
+            if future.cancel():
+                record_shed('coalescer_timeout')
+                raise ServiceOverloaded(wait=math.ceil(settings.WRITE_RETRY_AFTER))
+        # Запись уже выполняется в группе: ждём её исхода ещё один интервал
+        try:
+            return future.result(timeout)
+        except FutureTimeoutError:
+            logger.error("Coalesced write did not finish in %s seconds", 2 * timeout)
+            raise WriteOutcomeUnknown()
+
+    def stats(self):
+        return {'batches': self.batches, 'writes': self.writes}
+
+    def reset_stats(self):
+        self.batches = self.writes = 0
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # После fork (runprod) поток и очередь родительского процесса в воркере
+                # не работают; записи в ней принадлежат родителю
+                self._queue = queue.Queue()
+                self._thread = None
+                self._pid = os.getpid()
+            if self._thread is None or not self._thread.is_alive():
+                # Новый поток продолжает обрабатывать ту же очередь
+                self._thread = threading.Thread(
+                    target=self._run, args=(self._queue,), name='write-coalescer', daemon=True
+                )
+                self._thread.start()
+            return self._queue
+
+    def _run(self, pending):
+        while True:
+            batch = [pending.get()]
+            try:
+                deadline = time.monotonic() + settings.WRITE_COALESCING_DELAY
+                while len(batch) < settings.WRITE_COALESCING_BATCH_SIZE:
+                    timeout = deadline - time.monotonic()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(pending.get(timeout=timeout))
+                    except queue.Empty:
+                        break
+                self._commit(batch)
+            except Exception as exc:
+                # Поток не должен завершаться: запросы в очереди ждали бы его до таймаута
+                logger.exception("Write coalescer failed to process a batch")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+
+    def _commit(self, batch):
+        # Отменённые по таймауту записи не выполняются
+        batch = [(func, future) for func, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        results = []
+        try:
+            with transaction.atomic():
+                for func, future in batch:
+                    try:
+                        with transaction.atomic():
+                            results.append((future, func(), None))
+                    except Exception as exc:
+                        results.append((future, None, exc))
+        except Exception as exc:
+            # Группа не зафиксирована: ошибку получают все её запросы
+            for _, future in batch:
+                future.set_exception(exc)
+            try:
+                connection.close()
+            except Exception:
+                logger.exception("Could not close the write coalescer connection")
+            return
+
+        self.batches += 1
+        self.writes += len(batch)
+        for future, result, exc in results:
+            if exc is None:
+                future.set_result(result)
+            else:
+                future.set_exception(exc)
+
+
+coalescer = WriteCoalescer()
+
+
+def run_coalesced(func, *args):
+    """
+    Выполняет запись через коалесцер, если WRITE_COALESCING включён,
+    иначе — в собственной транзакции в текущем потоке.
+    """
+    if settings.WRITE_COALESCING:
+        return coalescer.submit(func, *args)
+    with transaction.atomic():
+        return func(*args)
@@ -0,0 +1,17 @@
+from django_filters.rest_framework import CharFilter, FilterSet
+
+from myapp.models import Book, Genre
+from myapp.utils import normalize_genre
+
+
+class BookFilter(FilterSet):
+    # Жанр передаётся названием, а фильтр идёт по целочисленному genre_id
+    genre = CharFilter(method='filter_genre')
+
+    class Meta:
+        model = Book
+        fields = ['author', 'genre', 'publication_date']
+
+    def filter_genre(self, queryset, name, value):
+        genre_ids = Genre.objects.filter(key=normalize_genre(value)).values('id')
+        return queryset.filter(genre_id__in=genre_ids)
@@ -0,0 +1,118 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, JsonResponse
+from rest_framework import status
+
+from myapp.throttling import authenticate_early, client_ident
+
+PENDING = 'pending'
+DONE = 'done'
+
+# Заголовки исходного ответа, которые повторяются при воспроизведении
+REPLAYED_HEADERS = ['Location']
+
+
+def body_fingerprint(request):
+    """
+    Хеш тела запроса. Граница multipart выбирается клиентом случайно при каждой
+    отправке, поэтому она исключается: иначе настоящий повтор получил бы 422.
+    """
+    body = request.body
+    if request.content_type == 'multipart/form-data' and request.content_params.get('boundary'):
+        body = body.replace(request.content_params['boundary'].encode(), b'')
+    return hashlib.sha256(body).hexdigest()
+
+
+class IdempotencyMixin:
+    """
+    Поддержка заголовка Idempotency-Key для представлений записи.
+
+    Первый запрос с ключом выполняется как обычно, а его ответ сохраняется в кеше
+    IDEMPOTENCY_CACHE на IDEMPOTENCY_KEY_TTL секунд. Повторы с тем же ключом
+    получают сохранённый ответ без обращения к таблицам Book и Author.
+    Ответы 429 и 5xx не сохраняются, такой запрос можно повторить. После 504
+    (исход записи неизвестен) ключ остаётся занятым до IDEMPOTENCY_LOCK_TIMEOUT,
+    чтобы повтор не выполнил запись второй раз.
+
+    Ключи разных клиентов (пользователей или IP, как в троттлинге) не пересекаются.
+    Чтобы повтор, попавший в другой процесс, не выполнился второй раз, кеш должен
+    быть общим для всех процессов и поддерживать атомарный add.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if not key:
+            return super().dispatch(request, *args, **kwargs)
+        if len(key) > 255:
+            return JsonResponse(
+                {"detail": "Idempotency-Key must be at most 255 characters long."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        drf_request = authenticate_early(self, request, *args, **kwargs)
+        if drf_request is None:
+            return super().dispatch(request, *args, **kwargs)
+        ident = client_ident(drf_request)
+
+        cache = caches[settings.IDEMPOTENCY_CACHE]
+        cache_key = 'idempotency_' + hashlib.sha256(
+            f"{ident}\n{request.method}\n{request.path}\n{key}".encode()
+        ).hexdigest()
+        fingerprint = body_fingerprint(request)
+
+        # Занимаем ключ атомарно: параллельный повтор увидит, что запрос ещё выполняется
+        if cache.add(cache_key, {'state': PENDING, 'fingerprint': fingerprint}, settings.IDEMPOTENCY_LOCK_TIMEOUT):
+            return self.dispatch_and_store(cache, cache_key, fingerprint, request, *args, **kwargs)
+
+        stored = cache.get(cache_key)
+        if stored is None:
+            # Запись истекла между add и get — выполняем запрос заново
+            return super().dispatch(request, *args, **kwargs)
+        if stored['fingerprint'] != fingerprint:
+            return JsonResponse(
+                {"detail": "Idempotency-Key was already used with a different request."},
+                status=status.HTTP_422_UNPROCESSABLE_ENTITY
+            )
+        if stored['state'] == PENDING:
+            return JsonResponse(
+                {"detail": "A request with this Idempotency-Key is still being processed."},
+                status=status.HTTP_409_CONFLICT
+            )
+
+        response = HttpResponse(
+            stored['content'],
+            status=stored['status'],
+            content_type=stored['content_type']
+        )
+        for header, value in stored['headers'].items():
+            response[header] = value
+        response['Idempotent-Replayed'] = 'true'
+        return response
+
+    def dispatch_and_store(self, cache, cache_key, fingerprint, request, *args, **kwargs):
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+        except BaseException:
+            cache.delete(cache_key)
+            raise
+
+        if response.status_code == status.HTTP_504_GATEWAY_TIMEOUT:
+            # Запись может ещё завершиться: повторы получают 409, пока ключ не истечёт
+            return response
+        if response.status_code >= 500 or response.status_code == status.HTTP_429_TOO_MANY_REQUESTS:
+            cache.delete(cache_key)
+            return response
+
+        cache.set(cache_key, {
+            'state': DONE,
+            'fingerprint': fingerprint,
+            'status': response.status_code,
+            'content': response.content,
+            'content_type': response.get('Content-Type'),
+            'headers': {header: response[header] for header in REPLAYED_HEADERS if header in response},
+        }, settings.IDEMPOTENCY_KEY_TTL)
+        return response
@@ -0,0 +1,35 @@
+import os
+import resource
+import tempfile
+from contextlib import contextmanager
+
+from django.core.management import call_command
+from django.db import connection
+
+
+def use_database(path):
+    """Переключает соединение по умолчанию на другой файл SQLite."""
+    connection.close()
+    connection.settings_dict['NAME'] = path
+
+
+@contextmanager
+def temporary_database():
+    """
+    Создаёт во временном каталоге базу SQLite с применёнными миграциями и
+    переключает на неё соединение, чтобы бенчмарки не трогали рабочую базу.
+    """
+    original = connection.settings_dict['NAME']
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'bench.sqlite3')
+        use_database(path)
+        try:
+            call_command('migrate', verbosity=0)
+            yield path
+        finally:
+            use_database(original)
+
+
+def peak_rss_mib():
+    """Пиковый резидентный размер текущего процесса в МиБ."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
@@ -0,0 +1,101 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment
+from django.urls import reverse
+
+from myapp.management.commands._bench import peak_rss_mib, temporary_database, use_database
+from myapp.models import Author, Book, Genre
+
+MODES = {
+    'regular': {},
+    'stream': {'stream': '1'},
+}
+
+
+class Command(BaseCommand):
+    help = "Compares peak RSS of the regular and streamed (?stream=1) GET /books/ listing."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help="Number of books.")
+        parser.add_argument('--authors', type=int, default=1000, help="Number of authors.")
+        parser.add_argument(
+            '--chunk-size', type=int, default=settings.STREAMING_CHUNK_SIZE,
+            help="STREAMING_CHUNK_SIZE for the streamed listing."
+        )
+        # Внутренние параметры: измерение одного режима в отдельном процессе
+        parser.add_argument('--worker-db', help="(internal)")
+        parser.add_argument('--worker-mode', choices=MODES, help="(internal)")
+
+    def handle(self, *args, **options):
+        if options['worker_db']:
+            return self.run_worker(options['worker_db'], options['worker_mode'], options['chunk_size'])
+
+        with temporary_database() as path:
+            self.stdout.write(f"Seeding {options['rows']} books of {options['authors']} authors...")
+            self.seed(options['rows'], options['authors'])
+
+            self.stdout.write(
+                f"\n{'mode':<10}{'seconds':>10}{'MiB sent':>10}{'peak RSS MiB':>14}{'request MiB':>13}"
+            )
+            for mode in MODES:
+                # Каждый режим измеряется в новом процессе, чтобы пиковый RSS не смешивался
+                result = subprocess.run(
+                    [
+                        sys.executable, os.path.join(settings.BASE_DIR, 'manage.py'), 'bench_list_memory',
+                        '--worker-db', path, '--worker-mode', mode, '--chunk-size', str(options['chunk_size']),
+                    ],
+                    capture_output=True, text=True
+                )
+                if result.returncode != 0:
+                    raise CommandError(f"Measuring '{mode}' failed:\n{result.stderr}")
+                run = json.loads(result.stdout)
+                self.stdout.write(
+                    f"{mode:<10}{run['seconds']:>10.2f}{run['bytes'] / 2 ** 20:>10.1f}"
+                    f"{run['peak_rss']:>14.1f}{run['peak_rss'] - run['rss_before']:>13.1f}"
+                )
+
+    def seed(self, rows, authors_count, batch_size=10_000):
+        with transaction.atomic():
+            genre = Genre.objects.for_name("Fiction")
+            authors = Author.objects.bulk_create(
+                [Author(name=f"Author {i}") for i in range(authors_count)], batch_size=batch_size
+            )
+            for offset in range(0, rows, batch_size):
+                Book.objects.bulk_create([
+                    Book(
+                        title=f"Book {i}",
+                        author=authors[i % authors_count],
+                        publication_date='2000-01-01',
+                        genre=genre
+                    )
+                    for i in range(offset, min(offset + batch_size, rows))
+                ])
+
+    def run_worker(self, path, mode, chunk_size):
+        use_database(path)
+        setup_test_environment()
+
+        with override_settings(STREAMING_CHUNK_SIZE=chunk_size):
+            rss_before = peak_rss_mib()
+            started = time.perf_counter()
+            response = Client().get(reverse('list-books'), MODES[mode])
+            if response.streaming:
+                sent = sum(len(chunk) for chunk in response.streaming_content)
+            else:
+                sent = len(response.content)
+            seconds = time.perf_counter() - started
+
+        self.stdout.write(json.dumps({
+            'seconds': seconds,
+            'bytes': sent,
+            'rss_before': rss_before,
+            'peak_rss': peak_rss_mib(),
+        }))
@@ -0,0 +1,126 @@
+import http.client
+import multiprocessing
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.utils import get_random_secret_key
+from django.db import transaction
+
+from myapp.management.commands._bench import temporary_database
+from myapp.models import Author, Book, Genre
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', port, timeout=1)
+            connection.request('GET', '/books/')
+            if connection.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"Server on port {port} did not start in {timeout} seconds.")
+
+
+def run_client(port, path, duration):
+    """Клиент с keep-alive соединением: отправляет запросы подряд и возвращает их число."""
+    done = 0
+    deadline = time.monotonic() + duration
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+    while time.monotonic() < deadline:
+        try:
+            connection.request('GET', path)
+            response = connection.getresponse()
+            response.read()
+            if response.status == 200:
+                done += 1
+            if response.getheader('Connection', '').lower() == 'close':
+                connection.close()
+        except (OSError, http.client.HTTPException):
+            connection.close()
+    connection.close()
+    return done
+
+
+class Command(BaseCommand):
+    help = "Compares requests per second of runserver and runprod on a local seeded database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--books', type=int, default=100, help="Number of books in the database.")
+        parser.add_argument('--path', default='/books/', help="Requested URL path.")
+        parser.add_argument('--duration', type=float, default=10, help="Seconds of load per server.")
+        parser.add_argument('--clients', type=int, default=8, help="Concurrent client processes.")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="runprod worker processes.")
+        parser.add_argument('--threads', type=int, default=4, help="runprod threads per worker.")
+
+    def handle(self, *args, **options):
+        with temporary_database() as path, tempfile.TemporaryDirectory() as cache_dir:
+            self.seed(options['books'])
+            env = {
+                **os.environ,
+                'DJANGO_SETTINGS_MODULE': 'restAPIbooks.settings_production',
+                'DJANGO_SQLITE_PATH': path,
+                'DJANGO_CACHE_DIR': cache_dir,
+                'DJANGO_SECRET_KEY': get_random_secret_key(),
+            }
+            manage_py = os.path.join(settings.BASE_DIR, 'manage.py')
+            servers = {
+                'runserver': (
+                    lambda port: [sys.executable, manage_py, 'runserver', '--noreload', f'127.0.0.1:{port}'],
+                    1
+                ),
+                'runprod': (
+                    lambda port: [
+                        sys.executable, manage_py, 'runprod', '--bind', f'127.0.0.1:{port}',
+                        '--workers', str(options['workers']), '--threads', str(options['threads']),
+                    ],
+                    options['workers']
+                ),
+            }
+
+            self.stdout.write(
+                f"GET {options['path']} with {options['clients']} keep-alive clients "
+                f"for {options['duration']} s each, {os.cpu_count()} CPU cores\n"
+            )
+            self.stdout.write(f"{'server':<12}{'processes':>10}{'requests':>10}{'req/s':>10}{'req/s/core':>12}")
+            for name, (command, processes) in servers.items():
+                port = free_port()
+                server = subprocess.Popen(
+                    command(port), env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+                )
+                try:
+                    wait_until_ready(port)
+                    with multiprocessing.Pool(options['clients']) as pool:
+                        counts = pool.starmap(
+                            run_client, [(port, options['path'], options['duration'])] * options['clients']
+                        )
+                finally:
+                    server.terminate()
+                    server.wait()
+
+                requests = sum(counts)
+                rps = requests / options['duration']
+                cores = min(processes, os.cpu_count() or 1)
+                self.stdout.write(f"{name:<12}{processes:>10}{requests:>10}{rps:>10.0f}{rps / cores:>12.0f}")
+
+    def seed(self, books):
+        with transaction.atomic():
+            author = Author.objects.create(name="Ray Bradbury")
+            genre = Genre.objects.for_name("Science Fiction")
+            Book.objects.bulk_create([
+                Book(title=f"Book {i}", author=author, publication_date='2000-01-01', genre=genre)
+                for i in range(books)
+            ])
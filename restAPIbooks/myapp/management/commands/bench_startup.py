@@ -0,0 +1,77 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Выполняется в отдельном процессе: то же, что делает рабочий процесс при старте,
+# плюс загрузка URL-конфигурации, которая иначе произошла бы на первом запросе
+WORKER_BOOT = """
+import json, resource, sys, time
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+from django.urls import get_resolver
+get_resolver().url_patterns
+print(json.dumps({
+    'boot': time.perf_counter() - started,
+    'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'modules': len(sys.modules),
+}))
+"""
+
+
+class Command(BaseCommand):
+    help = "Measures worker boot time and resident memory for settings profiles."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'profiles', nargs='*',
+            default=['restAPIbooks.settings', 'restAPIbooks.settings_api'],
+            help="Settings modules to compare."
+        )
+        parser.add_argument('--runs', type=int, default=5, help="Worker starts per profile.")
+        parser.add_argument(
+            '--budget-ms', type=float,
+            help="Fail if the median boot time of any profile exceeds this budget."
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"{'profile':<30}{'process ms':>12}{'boot ms':>10}{'max RSS MiB':>13}{'modules':>9}"
+        )
+        over_budget = []
+        for profile in options['profiles']:
+            runs = [self.boot_worker(profile) for _ in range(options['runs'])]
+            process_ms = statistics.median(run['process'] for run in runs) * 1000
+            boot_ms = statistics.median(run['boot'] for run in runs) * 1000
+            rss_mib = statistics.median(run['rss'] for run in runs) / 1024
+            modules = statistics.median(run['modules'] for run in runs)
+            self.stdout.write(
+                f"{profile:<30}{process_ms:>12.0f}{boot_ms:>10.0f}{rss_mib:>13.1f}{modules:>9.0f}"
+            )
+            if options['budget_ms'] is not None and boot_ms > options['budget_ms']:
+                over_budget.append(profile)
+
+        if over_budget:
+            raise CommandError(
+                f"Boot time over {options['budget_ms']} ms budget: {', '.join(over_budget)}"
+            )
+
+    def boot_worker(self, profile):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': profile}
+        started = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, '-c', WORKER_BOOT],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+        )
+        elapsed = time.perf_counter() - started
+        if result.returncode != 0:
+            raise CommandError(f"Worker with {profile} failed to start:\n{result.stderr}")
+        run = json.loads(result.stdout.strip().splitlines()[-1])
+        run['process'] = elapsed
+        return run
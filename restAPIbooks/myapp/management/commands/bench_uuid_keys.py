@@ -0,0 +1,86 @@
+import os
+import sqlite3
+import tempfile
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from myapp.utils import uuid7
+
+# Таблица повторяет схему, которую Django создаёт для Book в SQLite
+# (UUIDField хранится как char(32))
+CREATE_TABLE = """
+    CREATE TABLE bench_book (
+        id char(32) NOT NULL PRIMARY KEY,
+        title varchar(255) NOT NULL,
+        publication_date date NULL,
+        genre_id integer NULL,
+        author_id char(32) NOT NULL
+    )
+"""
+
+GENERATORS = {
+    'uuid4': uuid.uuid4,
+    'uuid7': uuid7,
+}
+
+
+class Command(BaseCommand):
+    help = "Compares insert throughput and primary key index size for uuid4 and uuid7 keys."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help="Number of rows to insert.")
+        parser.add_argument('--batch-size', type=int, default=10_000, help="Rows per transaction.")
+        parser.add_argument(
+            '--cache-size', type=int, default=2000,
+            help="SQLite page cache size in pages (small values expose poor locality)."
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write(
+            f"Inserting {options['rows']} rows in batches of {options['batch_size']}\n"
+        )
+        self.stdout.write(
+            f"{'keys':<8}{'seconds':>10}{'rows/s':>12}{'index MiB':>12}{'file MiB':>12}"
+        )
+        for name, generator in GENERATORS.items():
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                seconds, index_bytes, file_bytes = self.run(
+                    os.path.join(tmp_dir, 'bench.sqlite3'), generator, **options
+                )
+            self.stdout.write(
+                f"{name:<8}{seconds:>10.2f}{options['rows'] / seconds:>12.0f}"
+                f"{index_bytes / 2 ** 20:>12.1f}{file_bytes / 2 ** 20:>12.1f}"
+            )
+
+    def run(self, path, generator, rows, batch_size, cache_size, **options):
+        connection = sqlite3.connect(path, isolation_level=None)
+        connection.execute(f"PRAGMA cache_size = {cache_size}")
+        connection.execute(CREATE_TABLE)
+        author_id = uuid.uuid4().hex
+
+        started = time.perf_counter()
+        for offset in range(0, rows, batch_size):
+            batch = [
+                (generator().hex, f"Book {offset + i}", '2000-01-01', 1, author_id)
+                for i in range(min(batch_size, rows - offset))
+            ]
+            connection.execute("BEGIN")
+            connection.executemany("INSERT INTO bench_book VALUES (?, ?, ?, ?, ?)", batch)
+            connection.execute("COMMIT")
+        seconds = time.perf_counter() - started
+
+        index_bytes = self.index_size(connection)
+        connection.close()
+        return seconds, index_bytes, os.path.getsize(path)
+
+    def index_size(self, connection):
+        """Размер индекса первичного ключа; None, если SQLite собран без dbstat."""
+        try:
+            (size,) = connection.execute(
+                "SELECT SUM(pgsize) FROM dbstat WHERE name = 'sqlite_autoindex_bench_book_1'"
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return float('nan')
+        return size
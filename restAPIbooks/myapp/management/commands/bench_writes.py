@@ -0,0 +1,85 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings, setup_test_environment
+from django.urls import reverse
+
+from myapp.coalescer import coalescer
+from myapp.management.commands._bench import temporary_database
+from myapp.models import Author
+
+MODES = {
+    'direct': False,
+    'coalesced': True,
+}
+
+
+class Command(BaseCommand):
+    help = "Compares POST /books/create throughput with write coalescing off and on."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=32, help="Concurrent client threads.")
+        parser.add_argument('--duration', type=float, default=10, help="Seconds of load per mode.")
+        parser.add_argument('--batch-size', type=int, default=64, help="WRITE_COALESCING_BATCH_SIZE.")
+        parser.add_argument('--delay-ms', type=float, default=5, help="WRITE_COALESCING_DELAY in milliseconds.")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        with temporary_database():
+            author = Author.objects.create(name="Ray Bradbury")
+
+            self.stdout.write(
+                f"POST /books/create from {options['clients']} clients for {options['duration']} s each\n"
+            )
+            self.stdout.write(f"{'mode':<11}{'created':>9}{'errors':>8}{'writes/s':>10}{'p99 ms':>9}{'rows/commit':>13}")
+            for mode, enabled in MODES.items():
+                coalescer.reset_stats()
+                # Троттлинг и лимит одновременных записей отключены, чтобы мерить саму запись
+                with override_settings(
+                    WRITE_COALESCING=enabled,
+                    WRITE_COALESCING_BATCH_SIZE=options['batch_size'],
+                    WRITE_COALESCING_DELAY=options['delay_ms'] / 1000,
+                    WRITE_CONCURRENCY_LIMIT=None,
+                    REST_FRAMEWORK={'DEFAULT_THROTTLE_RATES': {'writes': None, 'writes_global': None}},
+                ):
+                    with ThreadPoolExecutor(options['clients']) as pool:
+                        runs = list(pool.map(
+                            lambda client: self.run_client(mode, client, author.id, options['duration']),
+                            range(options['clients'])
+                        ))
+
+                created = sum(len(latencies) for latencies, _ in runs)
+                errors = sum(failed for _, failed in runs)
+                latencies = sorted(latency for run, _ in runs for latency in run)
+                p99 = latencies[int(len(latencies) * 0.99)] * 1000 if latencies else float('nan')
+                stats = coalescer.stats()
+                per_commit = stats['writes'] / stats['batches'] if enabled and stats['batches'] else 1.0
+                self.stdout.write(
+                    f"{mode:<11}{created:>9}{errors:>8}{created / options['duration']:>10.0f}"
+                    f"{p99:>9.1f}{per_commit:>13.1f}"
+                )
+
+    def run_client(self, mode, client_id, author_id, duration):
+        """Отправляет запросы подряд; возвращает задержки успешных запросов и число ошибок."""
+        client = Client(raise_request_exception=False)
+        latencies = []
+        failed = 0
+        deadline = time.monotonic() + duration
+        i = 0
+        try:
+            while time.monotonic() < deadline:
+                started = time.perf_counter()
+                response = client.post(reverse('create-book'), {
+                    "title": f"{mode} {client_id}-{i}", "author_id": str(author_id), "genre": "Sci-Fi"
+                })
+                if response.status_code == 201:
+                    latencies.append(time.perf_counter() - started)
+                else:
+                    failed += 1
+                i += 1
+        finally:
+            connection.close()
+        return latencies, failed
@@ -0,0 +1,75 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+
+def default_workers():
+    return 2 * (os.cpu_count() or 1) + 1
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs the API under gunicorn: preforked worker processes with threads and "
+        "HTTP/1.1 keep-alive. Send SIGHUP to the master for a graceful reload."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default='127.0.0.1:8000', help="Address to listen on.")
+        parser.add_argument(
+            '--workers', type=int, default=default_workers(),
+            help="Number of worker processes (default: 2 * CPU cores + 1)."
+        )
+        parser.add_argument('--threads', type=int, default=4, help="Threads per worker process.")
+        parser.add_argument(
+            '--keepalive', type=int, default=5,
+            help="Seconds to keep an idle HTTP/1.1 connection open."
+        )
+        parser.add_argument('--timeout', type=int, default=30, help="Seconds before a stuck worker is restarted.")
+        parser.add_argument(
+            '--graceful-timeout', type=int, default=30,
+            help="Seconds workers get to finish requests on reload or shutdown."
+        )
+        parser.add_argument(
+            '--max-requests', type=int, default=0,
+            help="Restart a worker after this many requests (0 disables)."
+        )
+        parser.add_argument(
+            '--no-preload', action='store_false', dest='preload',
+            help="Load the application in each worker instead of once before forking."
+        )
+
+    def handle(self, *args, **options):
+        try:
+            from gunicorn.app.base import BaseApplication
+        except ImportError:
+            raise CommandError("gunicorn is not installed. Install it with: pipenv install gunicorn")
+
+        class ProductionServer(BaseApplication):
+            def load_config(self):
+                for name, value in {
+                    'bind': options['bind'],
+                    'workers': options['workers'],
+                    'threads': options['threads'],
+                    # gthread-воркеры поддерживают keep-alive, sync-воркеры — нет
+                    'worker_class': 'gthread',
+                    'keepalive': options['keepalive'],
+                    'timeout': options['timeout'],
+                    'graceful_timeout': options['graceful_timeout'],
+                    'max_requests': options['max_requests'],
+                    'max_requests_jitter': options['max_requests'] // 10,
+                    # Приложение загружается в мастере до fork, и воркеры делят
+                    # его память (copy-on-write)
+                    'preload_app': options['preload'],
+                }.items():
+                    self.cfg.set(name, value)
+
+            def load(self):
+                from restAPIbooks.wsgi import application
+
+                # Соединения, открытые при загрузке (например, прогрев кеша авторов),
+                # нельзя передавать воркерам через fork
+                connections.close_all()
+                return application
+
+        ProductionServer().run()
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.3 on 2026-10-19 13:59
+
+import myapp.utils
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='author',
+            name='id',
+            field=models.UUIDField(default=myapp.utils.uuid7, editable=False, primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='book',
+            name='id',
+            field=models.UUIDField(default=myapp.utils.uuid7, editable=False, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+    ]
@@ -0,0 +1,83 @@
+# Generated by Django 5.1.3 on 2026-10-19 14:20
+
+import re
+from collections import Counter, defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def normalize_genre(name):
+    # Копия myapp.utils.normalize_genre на момент миграции
+    return re.sub(r'[\W_]+', '', name.casefold())
+
+
+def genres_to_table(apps, schema_editor):
+    """Переносит названия жанров в таблицу Genre, объединяя варианты написания."""
+    Book = apps.get_model('myapp', 'Book')
+    Genre = apps.get_model('myapp', 'Genre')
+
+    counts = Counter(
+        Book.objects.exclude(genre__isnull=True).values_list('genre', flat=True)
+    )
+    variants = defaultdict(list)
+    for name, count in counts.items():
+        if normalize_genre(name):
+            variants[normalize_genre(name)].append((count, name))
+
+    for key, names in variants.items():
+        # Название жанра — самый частый вариант написания
+        _, display_name = max(names)
+        genre = Genre.objects.create(key=key, name=display_name.strip())
+        Book.objects.filter(genre__in=[name for _, name in names]).update(genre_ref=genre)
+
+
+def genres_to_text(apps, schema_editor):
+    Book = apps.get_model('myapp', 'Book')
+    Genre = apps.get_model('myapp', 'Genre')
+
+    for genre in Genre.objects.all():
+        Book.objects.filter(genre_ref=genre).update(genre=genre.name)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0003_changelogentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Genre',
+            fields=[
+                ('id', models.SmallAutoField(primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(help_text='Display name of the genre.', max_length=100, verbose_name='Name')),
+                ('key', models.CharField(help_text="Normalized name used to match spelling variants (e.g., 'Sci-Fi' and 'sci fi').", max_length=100, unique=True, verbose_name='Key')),
+            ],
+            options={
+                'verbose_name': 'Genre',
+                'verbose_name_plural': 'Genres',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.AddField(
+            model_name='book',
+            name='genre_ref',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='myapp.genre'),
+        ),
+        migrations.RunPython(genres_to_table, genres_to_text),
+        migrations.RemoveField(
+            model_name='book',
+            name='genre',
+        ),
+        migrations.RenameField(
+            model_name='book',
+            old_name='genre_ref',
+            new_name='genre',
+        ),
+        migrations.AlterField(
+            model_name='book',
+            name='genre',
+            field=models.ForeignKey(blank=True, help_text='Enter the genre of the book (e.g., Historical Fiction).', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='books', to='myapp.genre', verbose_name='Genre'),
+        ),
+    ]
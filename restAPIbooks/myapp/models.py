@@ -1,10 +1,12 @@
-import uuid
+from django.core.serializers.json import DjangoJSONEncoder
 from django.db import models
 
+from myapp.utils import normalize_genre, uuid7
+
 class Author(models.Model):
     id = models.UUIDField(
         primary_key=True, 
-        default=uuid.uuid4, 
+        default=uuid7, 
         editable=False
     )
     name = models.CharField(
@@ -37,10 +39,47 @@ class Author(models.Model):
         return self.name
 
 
+class GenreManager(models.Manager):
+    def for_name(self, name):
+        """Возвращает жанр по названию (с учётом вариантов написания), создавая его при необходимости."""
+        if name is None or not normalize_genre(name):
+            return None
+        genre, _ = self.get_or_create(key=normalize_genre(name), defaults={'name': name.strip()})
+        return genre
+
+
+class Genre(models.Model):
+    id = models.SmallAutoField(
+        primary_key=True,
+        verbose_name="ID"
+    )
+    name = models.CharField(
+        max_length=100,
+        verbose_name="Name",
+        help_text="Display name of the genre."
+    )
+    key = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name="Key",
+        help_text="Normalized name used to match spelling variants (e.g., 'Sci-Fi' and 'sci fi')."
+    )
+
+    objects = GenreManager()
+
+    class Meta:
+        verbose_name = "Genre"
+        verbose_name_plural = "Genres"
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
+
+
 class Book(models.Model):
     id = models.UUIDField(
         primary_key=True,
-        default=uuid.uuid4,
+        default=uuid7,
         editable=False,
         verbose_name="ID",
     )
@@ -64,10 +103,12 @@ class Book(models.Model):
         verbose_name="Publication Date",
         help_text="Enter the publication date of the book (format: YYYY-MM-DD)."
     )
-    genre = models.CharField(
-        max_length=100,
+    genre = models.ForeignKey(
+        Genre,
+        on_delete=models.SET_NULL,
         blank=True,
         null=True,
+        related_name="books",
         verbose_name="Genre",
         help_text="Enter the genre of the book (e.g., Historical Fiction)."
     )
@@ -79,3 +120,54 @@ class Book(models.Model):
 
     def __str__(self):
         return self.title
+
+
+class ChangeLogEntry(models.Model):
+    """Запись журнала изменений книг и авторов для инкрементальной синхронизации."""
+    ENTITY_AUTHOR = 'author'
+    ENTITY_BOOK = 'book'
+    ENTITY_CHOICES = [
+        (ENTITY_AUTHOR, "Author"),
+        (ENTITY_BOOK, "Book"),
+    ]
+    ACTION_INSERT = 'insert'
+    ACTION_UPDATE = 'update'
+    ACTION_DELETE = 'delete'
+    ACTION_CHOICES = [
+        (ACTION_INSERT, "Insert"),
+        (ACTION_UPDATE, "Update"),
+        (ACTION_DELETE, "Delete"),
+    ]
+
+    entity = models.CharField(
+        max_length=10,
+        choices=ENTITY_CHOICES,
+        verbose_name="Entity"
+    )
+    object_id = models.UUIDField(
+        verbose_name="Object ID"
+    )
+    action = models.CharField(
+        max_length=10,
+        choices=ACTION_CHOICES,
+        verbose_name="Action"
+    )
+    data = models.JSONField(
+        blank=True,
+        null=True,
+        encoder=DjangoJSONEncoder,
+        verbose_name="Data",
+        help_text="Serialized object after the change, empty for deletions."
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="Created At"
+    )
+
+    class Meta:
+        verbose_name = "Change Log Entry"
+        verbose_name_plural = "Change Log"
+        ordering = ["id"]
+
+    def __str__(self):
+        return f"{self.action} {self.entity} {self.object_id}"
@@ -0,0 +1,226 @@
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import connection
+
+from myapp.throttling import authenticate_early
+from myapp.utils import uuid7
+
+logger = logging.getLogger(__name__)
+
+PROFILE_VALUES = ('1', 'true', 'yes')
+# Только разбивка по фазам, без профилировщика стеков и его накладных расходов
+TIMINGS_VALUE = 'timings'
+
+
+def profiling_mode(request):
+    """
+    Режим профилирования из параметра `?profile=` или заголовка `X-Profile`:
+    'stacks', 'timings' или None, если профилирование не запрошено.
+    """
+    value = (request.GET.get('profile') or request.META.get('HTTP_X_PROFILE') or '').lower()
+    if value in PROFILE_VALUES:
+        return 'stacks'
+    if value == TIMINGS_VALUE:
+        return 'timings'
+    return None
+
+
+def frame_name(frame):
+    return f"{frame.f_globals.get('__name__', '?')}.{frame.f_code.co_qualname}"
+
+
+def builtin_name(func):
+    return f"{getattr(func, '__module__', None) or 'builtins'}.{getattr(func, '__qualname__', repr(func))}"
+
+
+class StackProfiler:
+    """
+    Детерминированный профилировщик стеков вызовов текущего потока (sys.setprofile).
+
+    Время между событиями вызова и возврата приписывается текущему стеку, а результат
+    выводится в формате folded stacks («a;b;c 1234», микросекунды), который понимают
+    flamegraph.pl, speedscope и inferno. Стек отсчитывается от места запуска профилировщика.
+    """
+
+    def __init__(self):
+        self.stacks = Counter()
+        self._stack = ()
+        self._parents = []
+        self._last = None
+
+    def start(self):
+        self._last = time.perf_counter_ns()
+        sys.setprofile(self._hook)
+
+    def stop(self):
+        sys.setprofile(None)
+
+    def _hook(self, frame, event, arg):
+        now = time.perf_counter_ns()
+        if self._stack:
+            self.stacks[self._stack] += now - self._last
+        if event == 'call':
+            self._parents.append(self._stack)
+            self._stack += (frame_name(frame),)
+        elif event == 'c_call':
+            self._parents.append(self._stack)
+            self._stack += (builtin_name(arg),)
+        elif self._parents:
+            # return, c_return, c_exception; возвраты из кадров, начатых до запуска, пропускаем
+            self._stack = self._parents.pop()
+        self._last = time.perf_counter_ns()
+
+    def folded(self):
+        return ''.join(
+            f"{';'.join(stack)} {nanoseconds // 1000}\n"
+            for stack, nanoseconds in sorted(self.stacks.items())
+            if nanoseconds >= 1000
+        )
+
+
+class PhaseTimer:
+    """
+    Время по фазам обработки запроса. Время вложенной фазы (например, запросов к базе
+    внутри сериализации) вычитается из внешней, поэтому фазы в сумме дают общее время.
+    """
+
+    def __init__(self):
+        self.durations = {}
+        self.queries = 0
+        self._nested = []
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            nested = self._nested.pop()
+            self.durations[name] = self.durations.get(name, 0.0) + elapsed - nested
+            if self._nested:
+                self._nested[-1] += elapsed
+
+    def timed(self, func, name):
+        def wrapper(*args, **kwargs):
+            with self.phase(name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    def execute_wrapper(self, execute, sql, params, many, context):
+        self.queries += 1
+        with self.phase('db'):
+            return execute(sql, params, many, context)
+
+    def server_timing(self):
+        durations = {**self.durations, 'total': sum(self.durations.values())}
+        metrics = [
+            f'{name};dur={seconds * 1000:.2f}' + (f';desc="queries: {self.queries}"' if name == 'db' else '')
+            for name, seconds in durations.items()
+        ]
+        return ', '.join(metrics)
+
+
+class ProfilingMixin:
+    """
+    Профилирование отдельного запроса по параметру `?profile=1` или заголовку
+    `X-Profile: 1` от пользователя с is_staff.
+
+    Время разбивается по фазам: каждый фильтр (filter.<класс>), запросы к базе (db),
+    код представления и сериализатора (serialize), рендеринг ответа (render) и
+    остальная обработка в DRF (other). Разбивка возвращается в заголовке Server-Timing.
+    Запрос также выполняется под StackProfiler; профиль и разбивка сохраняются
+    в PROFILE_DIR, а их id возвращается в заголовке X-Profile-Id. Профилировщик
+    замедляет код на Python, поэтому `?profile=timings` даёт только разбивку без него.
+
+    Без параметра запрос обрабатывается как обычно. Права проверяются до установки
+    обёрток, поэтому запросы остальных пользователей с параметром тоже идут обычным путём.
+    В PROFILE_DIR хранится не больше PROFILE_MAX_COUNT последних профилей.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        mode = profiling_mode(request)
+        if mode is None:
+            return super().dispatch(request, *args, **kwargs)
+
+        drf_request = authenticate_early(self, request, *args, **kwargs)
+        if drf_request is None or not drf_request.user.is_staff:
+            return super().dispatch(request, *args, **kwargs)
+
+        self.phase_timer = PhaseTimer()
+        self.stack_profiler = StackProfiler() if mode == 'stacks' else None
+        self.filter_queryset = self.profiled_filter_queryset
+        handler_name = request.method.lower()
+        handler = getattr(self, handler_name, None)
+        if handler is not None:
+            setattr(self, handler_name, self.phase_timer.timed(handler, 'serialize'))
+
+        try:
+            with connection.execute_wrapper(self.phase_timer.execute_wrapper), self.phase_timer.phase('other'):
+                if self.stack_profiler:
+                    self.stack_profiler.start()
+                response = super().dispatch(request, *args, **kwargs)
+                if hasattr(response, 'render'):
+                    with self.phase_timer.phase('render'):
+                        response.render()
+        finally:
+            if self.stack_profiler:
+                self.stack_profiler.stop()
+
+        response['Server-Timing'] = self.phase_timer.server_timing()
+        profile_id = self.store_profile(drf_request)
+        if profile_id:
+            response['X-Profile-Id'] = profile_id
+        return response
+
+    def profiled_filter_queryset(self, queryset):
+        for backend in list(self.filter_backends):
+            with self.phase_timer.phase(f'filter.{backend.__name__}'):
+                queryset = backend().filter_queryset(self.request, queryset, self)
+        return queryset
+
+    def store_profile(self, request):
+        if not settings.PROFILE_DIR:
+            return None
+        profile_id = uuid7().hex
+        path = os.path.join(settings.PROFILE_DIR, profile_id)
+        try:
+            os.makedirs(settings.PROFILE_DIR, exist_ok=True)
+            if self.stack_profiler:
+                with open(f'{path}.folded', 'w') as folded:
+                    folded.write(self.stack_profiler.folded())
+            with open(f'{path}.json', 'w') as summary:
+                json.dump({
+                    'path': request.get_full_path(),
+                    'user': request.user.get_username(),
+                    'created_at': datetime.now(timezone.utc).isoformat(),
+                    'queries': self.phase_timer.queries,
+                    'phases_ms': {
+                        name: round(seconds * 1000, 3) for name, seconds in self.phase_timer.durations.items()
+                    },
+                }, summary, indent=2)
+            self.prune_profiles()
+        except OSError:
+            logger.exception("Could not store profile %s", profile_id)
+            return None
+        return profile_id
+
+    def prune_profiles(self):
+        """Удаляет самые старые профили сверх PROFILE_MAX_COUNT (id uuid7 упорядочены по времени)."""
+        profile_ids = sorted({name.split('.')[0] for name in os.listdir(settings.PROFILE_DIR)})
+        excess = len(profile_ids) - settings.PROFILE_MAX_COUNT
+        for profile_id in profile_ids[:max(excess, 0)]:
+            for extension in ('folded', 'json'):
+                try:
+                    os.remove(os.path.join(settings.PROFILE_DIR, f'{profile_id}.{extension}'))
+                except FileNotFoundError:
+                    pass
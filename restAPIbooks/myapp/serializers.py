@@ -1,12 +1,16 @@
 ﻿from rest_framework.serializers import (
     ModelSerializer,
+    ListSerializer,
     UUIDField,
-    StringRelatedField,
     SerializerMethodField,
     ValidationError,
-    DateField
+    DateField,
+    IntegerField,
+    CharField
 )
-from myapp.models import Author, Book
+from django.db import IntegrityError, transaction
+from myapp.author_cache import author_cache
+from myapp.models import Author, Book, ChangeLogEntry, Genre
 
 class AuthorSerializer(ModelSerializer):
     class Meta:
@@ -27,17 +31,65 @@ class AuthorSerializer(ModelSerializer):
         return data
 
 
+class GenreField(CharField):
+    """
+    Жанр принимается и выводится названием, а хранится ссылкой на Genre.
+    При проверке остаётся названием: запись Genre ищется или создаётся
+    в BookSerializer.create/update, внутри транзакции записи.
+    """
+
+    def __init__(self, **kwargs):
+        kwargs.setdefault('max_length', 100)
+        kwargs.setdefault('required', False)
+        kwargs.setdefault('allow_null', True)
+        kwargs.setdefault('allow_blank', True)
+        super().__init__(**kwargs)
+
+    def to_representation(self, value):
+        return value.name
+
+
+class AuthorBookSerializer(ModelSerializer):
+    """Книга внутри автора: без полей автора, они уже есть у родителя"""
+    genre = GenreField()
+
+    class Meta:
+        model = Book
+        fields = ['id', 'title', 'publication_date', 'genre']
+
+
+class AuthorWithBooksSerializer(AuthorSerializer):
+    books = AuthorBookSerializer(source='included_books', many=True, read_only=True)
+
+    class Meta(AuthorSerializer.Meta):
+        fields = AuthorSerializer.Meta.fields + ['books']
+
+
+class BookListSerializer(ListSerializer):
+    def to_representation(self, data):
+        """Загружает имена всех авторов страницы в кеш одним запросом"""
+        books = list(data.all() if hasattr(data, 'all') else data)
+        author_cache.get_many({book.author_id for book in books})
+        return super().to_representation(books)
+
+
 class BookSerializer(ModelSerializer):
     author_id = UUIDField(
         # write_only=True,
         help_text="Provide the UUID of the author."
     )
-    author = StringRelatedField(read_only=True)
+    author = SerializerMethodField()
+    genre = GenreField(help_text="Enter the genre of the book (e.g., Historical Fiction).")
     # available_authors = SerializerMethodField()
 
     class Meta:
         model = Book
         fields = ['id', 'title', 'author', 'author_id', 'publication_date', 'genre']
+        list_serializer_class = BookListSerializer
+
+    def get_author(self, obj):
+        """Имя автора из кеша вместо отдельного запроса для каждой книги"""
+        return author_cache.name(obj.author_id)
 
     # def get_available_authors(self, obj):
     #     """Возвращает список доступных авторов"""
@@ -46,15 +98,40 @@ class BookSerializer(ModelSerializer):
 
     def validate_author_id(self, value):
         """Проверка, что указанный author_id существует"""
-        if not Author.objects.filter(id=value).exists():
+        if not author_cache.exists(value):
             raise ValidationError("Author with the provided ID does not exist.")
         return value
 
     def create(self, validated_data):
         """Создание книги с использованием author_id"""
         author_id = validated_data.pop('author_id')
-        author = Author.objects.get(id=author_id)
-        return Book.objects.create(author=author, **validated_data)
+        try:
+            with transaction.atomic():
+                self.resolve_genre(validated_data)
+                book = Book.objects.create(author_id=author_id, **validated_data)
+                # validate_author_id проверяет автора по кешу процесса, а внешний ключ
+                # в SQLite отложенный и проверяется только при фиксации всей транзакции
+                # (в режиме WRITE_COALESCING — всей группы). Поэтому проверяем автора
+                # здесь: после вставки база заблокирована на запись, и удалить его
+                # до фиксации никто не может
+                if not Author.objects.filter(pk=author_id).exists():
+                    raise IntegrityError("FOREIGN KEY constraint failed")
+        except IntegrityError:
+            if Author.objects.filter(pk=author_id).exists():
+                raise
+            # Автор удалён другим процессом или в обход сигналов: запись в кеше устарела
+            author_cache.invalidate(author_id)
+            raise ValidationError({'author_id': ["Author with the provided ID does not exist."]})
+        return book
+
+    def update(self, instance, validated_data):
+        self.resolve_genre(validated_data)
+        return super().update(instance, validated_data)
+
+    def resolve_genre(self, validated_data):
+        """Заменяет название жанра записью Genre, создавая её при необходимости"""
+        if 'genre' in validated_data:
+            validated_data['genre'] = Genre.objects.for_name(validated_data['genre'])
 
     def validate(self, data):
         title = data.get('title')
@@ -65,4 +142,12 @@ class BookSerializer(ModelSerializer):
                 {"detail": "An author with this name and birth date already exists."}
             )
 
-        return data
\ No newline at end of file
+        return data
+
+
+class ChangeLogEntrySerializer(ModelSerializer):
+    cursor = IntegerField(source='id', read_only=True)
+
+    class Meta:
+        model = ChangeLogEntry
+        fields = ['cursor', 'entity', 'object_id', 'action', 'data', 'created_at']
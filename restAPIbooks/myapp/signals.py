@@ -0,0 +1,23 @@
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from myapp.author_cache import author_cache
+from myapp.models import Author
+
+
+@receiver(post_save, sender=Author)
+@receiver(post_delete, sender=Author)
+def invalidate_author_cache(sender, instance, **kwargs):
+    """Сбрасывает запись автора в кеше сразу и ещё раз после фиксации транзакции."""
+    author_id = instance.pk
+    author_cache.invalidate(author_id)
+    # Другой поток мог успеть закешировать старые данные до фиксации
+    transaction.on_commit(lambda: author_cache.invalidate(author_id))
+
+
+@receiver(request_started)
+def mark_author_cache_version_stale(sender, **kwargs):
+    """Версия общего кеша авторов проверяется один раз за запрос, при первом обращении."""
+    author_cache.mark_shared_version_stale()
@@ -0,0 +1,39 @@
+from itertools import islice
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import JSONRenderer
+
+STREAM_VALUES = ('1', 'true', 'yes')
+
+
+class StreamingListMixin:
+    """
+    Режим `?stream=1` для списков: JSON-массив отдаётся потоком по частям.
+
+    Записи читаются через `.iterator(chunk_size=STREAMING_CHUNK_SIZE)` без кеша
+    QuerySet, каждая часть сериализуется и рендерится отдельно, поэтому в памяти
+    одновременно находится не больше одной части, а не весь список трижды
+    (модели, данные сериализатора и готовый JSON).
+    """
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get('stream', '').lower() not in STREAM_VALUES:
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return StreamingHttpResponse(self.stream_json(queryset), content_type='application/json')
+
+    def stream_json(self, queryset):
+        chunk_size = settings.STREAMING_CHUNK_SIZE
+        renderer = JSONRenderer()
+
+        yield b'['
+        separator = b''
+        rows = queryset.iterator(chunk_size=chunk_size)
+        while chunk := list(islice(rows, chunk_size)):
+            content = renderer.render(self.get_serializer(chunk, many=True).data)
+            # Убираем скобки массива части и склеиваем элементы через запятую
+            yield separator + content[1:-1]
+            separator = b','
+        yield b']'
@@ -1,11 +1,34 @@
-﻿from django.test import TestCase
-from rest_framework.test import APITestCase
+﻿from django.test import TestCase, override_settings
+from django.test.client import encode_multipart
+from django.test.utils import CaptureQueriesContext
+from django.db import OperationalError, connection
+from django.core.cache import cache, caches
+from rest_framework.test import APIClient, APITestCase, APITransactionTestCase
 from rest_framework import status
 from django.urls import reverse
+from django.conf import settings
+from django.contrib.auth.models import User
 
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import base64
+import json
+import multiprocessing
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from unittest import mock
 
-from myapp.models import Author, Book
+from myapp.author_cache import AuthorLookupCache, author_cache
+from myapp.cache import LockedFileBasedCache
+from myapp.coalescer import coalescer
+from myapp.models import Author, Book, ChangeLogEntry, Genre
+from myapp.throttling import get_shed_stats, reset_shed_stats, write_limiter
+from myapp.views import BookCreateView
 
 # Create your tests here.
 
@@ -89,7 +112,7 @@ class BookCreateViewTest(APITestCase):
             title="Fahrenheit 451",  # Уже существующая книга
             author=self.author,
             publication_date="1953-10-19",
-            genre="Dystopian"
+            genre=Genre.objects.for_name("Dystopian")
         )
 
     def test_create_book_successful(self):
@@ -154,7 +177,7 @@ class BookDeleteViewTest(APITestCase):
             title="Fahrenheit 451",
             author=self.author,
             publication_date="1953-10-19",
-            genre="Dystopian"
+            genre=Genre.objects.for_name("Dystopian")
         )
 
     def test_delete_book_successful(self):
@@ -204,13 +227,13 @@ class AuthorDeleteViewTest(APITestCase):
             title="Fahrenheit 451",
             author=self.author,
             publication_date="1953-10-19",
-            genre="Dystopian"
+            genre=Genre.objects.for_name("Dystopian")
         )
         self.book2 = Book.objects.create(
             title="The Martian Chronicles",
             author=self.author,
             publication_date="1950-05-03",
-            genre="Science Fiction"
+            genre=Genre.objects.for_name("Science Fiction")
         )
 
     def test_delete_author_successful(self):
@@ -266,7 +289,7 @@ class BookUpdateViewTest(APITestCase):
             title="Fahrenheit 451",
             author=self.author,
             publication_date="1953-10-19",
-            genre="Dystopian"
+            genre=Genre.objects.for_name("Dystopian")
         )
         self.valid_book_data = {
             "title": "Fahrenheit 451 Updated",
@@ -293,7 +316,7 @@ class BookUpdateViewTest(APITestCase):
         expected_date = datetime.strptime(self.valid_book_data['publication_date'], "%Y-%m-%d").date()
         self.assertEqual(self.book.publication_date, expected_date)
 
-        self.assertEqual(self.book.genre, self.valid_book_data['genre'])
+        self.assertEqual(self.book.genre.name, self.valid_book_data['genre'])
 
         # Проверка, что ответ содержит правильные данные
         self.assertEqual(response.data['message'], f"Book with ID '{self.book.id}' updated successfully!")
@@ -315,6 +338,1036 @@ class BookUpdateViewTest(APITestCase):
         self.assertEqual(response.data['detail'], f"Book with ID '{non_existent_id}' not found.")
 
 
+class WriteLoadSheddingTest(APITestCase):
+    """
+    Тесты для проверки троттлинга и ограничения конкурентности на запись.
+    """
+
+    def setUp(self):
+        """
+        Настройка тестовых данных.
+        """
+        cache.clear()
+        reset_shed_stats()
+        self.addCleanup(cache.clear)
+        self.url = reverse('create-author')
+
+    @override_settings(REST_FRAMEWORK={
+        'DEFAULT_THROTTLE_RATES': {'writes': '2/min', 'writes_global': '100/min'},
+    })
+    def test_client_throttle(self):
+        """
+        Проверяет, что после исчерпания корзины клиент получает 429 с Retry-After.
+        """
+        for name in ("Ray Bradbury", "Isaac Asimov"):
+            response = self.client.post(self.url, {"name": name})
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.post(self.url, {"name": "Stanislaw Lem"})
+
+        # Третий запрос в ту же минуту отклоняется
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+        self.assertEqual(Author.objects.count(), 2)
+        self.assertEqual(get_shed_stats().get('throttled'), 1)
+
+    @override_settings(REST_FRAMEWORK={
+        'DEFAULT_THROTTLE_RATES': {'writes': '2/min', 'writes_global': '10/min'},
+    })
+    def test_throttled_client_does_not_drain_global_bucket(self):
+        """
+        Проверяет, что отклонённые запросы одного клиента не тратят общую корзину.
+        """
+        for i in range(12):
+            self.client.post(self.url, {"name": f"Author {i}"}, REMOTE_ADDR='10.0.0.1')
+
+        response = self.client.post(self.url, {"name": "Ray Bradbury"}, REMOTE_ADDR='10.0.0.2')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Author.objects.count(), 3)
+        self.assertEqual(get_shed_stats().get('throttled'), 10)
+
+    @override_settings(WRITE_CONCURRENCY_LIMIT=0, WRITE_RETRY_AFTER=3)
+    def test_concurrency_limit(self):
+        """
+        Проверяет, что при превышении числа одновременных записей возвращается 503.
+        """
+        response = self.client.post(self.url, {"name": "Ray Bradbury"})
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '3')
+        self.assertFalse(Author.objects.exists())
+        self.assertEqual(get_shed_stats().get('overloaded'), 1)
+
+    @override_settings(WRITE_CONCURRENCY_LIMIT=1)
+    def test_slot_released_after_server_error(self):
+        """
+        Проверяет, что необработанная ошибка базы не занимает слот записи навсегда.
+        """
+        self.client.raise_request_exception = False
+        with mock.patch(
+            'myapp.views.AuthorCreateView.perform_create', side_effect=OperationalError("database is locked")
+        ):
+            for _ in range(2):
+                response = self.client.post(self.url, {"name": "Ray Bradbury"})
+                self.assertEqual(response.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+        self.assertEqual(write_limiter.in_flight, 0)
+        response = self.client.post(self.url, {"name": "Ray Bradbury"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_reads_not_limited(self):
+        """
+        Проверяет, что чтение не попадает под ограничения записи.
+        """
+        with override_settings(WRITE_CONCURRENCY_LIMIT=0):
+            response = self.client.get(reverse('list-books'))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(get_shed_stats(), {})
+
+
+class UUIDPrimaryKeyTest(TestCase):
+    """
+    Тесты для проверки упорядоченных по времени первичных ключей.
+    """
+
+    def test_keys_are_uuid7_and_ordered(self):
+        """
+        Проверяет, что ключи авторов и книг — UUIDv7 и растут в порядке создания.
+        """
+        authors = [Author.objects.create(name=f"Author {i}") for i in range(50)]
+        book = Book.objects.create(title="Fahrenheit 451", author=authors[0])
+
+        ids = [author.id for author in authors]
+        self.assertEqual(ids, sorted(ids))
+        self.assertEqual(len(set(ids)), len(ids))
+        self.assertTrue(all(author_id.version == 7 for author_id in ids))
+        self.assertEqual(book.id.version, 7)
+
+
+class ApiOnlySettingsTest(TestCase):
+    """
+    Тесты для проверки профилей настроек restAPIbooks.settings_api и settings_production.
+    """
+
+    def test_docs_and_admin_not_loaded(self):
+        """
+        Проверяет, что рабочий процесс API не импортирует документацию, админку и сессии.
+        """
+        script = (
+            "import json, sys, django; django.setup();"
+            "from django.apps import apps;"
+            "from django.urls import get_resolver, reverse;"
+            "get_resolver().url_patterns;"
+            "print(json.dumps({"
+            "'modules': sorted(m for m in sys.modules if m.startswith(('drf_yasg', 'django.contrib.sessions'))),"
+            "'admin': apps.is_installed('django.contrib.admin'),"
+            "'books_url': reverse('list-books')}))"
+        )
+        result = subprocess.run(
+            [sys.executable, '-c', script],
+            cwd=settings.BASE_DIR,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'restAPIbooks.settings_api'},
+            capture_output=True, text=True, check=True
+        )
+        worker = json.loads(result.stdout)
+
+        self.assertEqual(worker['modules'], [])
+        self.assertFalse(worker['admin'])
+        self.assertEqual(worker['books_url'], '/books/')
+
+    def test_production_requires_secret_key(self):
+        """
+        Проверяет, что рабочий профиль не запускается с ключом разработки.
+        """
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': 'restAPIbooks.settings_production'}
+        env.pop('DJANGO_SECRET_KEY', None)
+        result = subprocess.run(
+            [sys.executable, '-c', "import django; django.setup()"],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True
+        )
+
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn("DJANGO_SECRET_KEY", result.stderr)
+
+
+class AuthorLookupCacheTest(APITestCase):
+    """
+    Тесты для проверки кеша авторов, используемого при записи и выводе книг.
+    """
+
+    def setUp(self):
+        """
+        Настройка тестовых данных.
+        """
+        author_cache.clear()
+        self.addCleanup(author_cache.clear)
+        self.author = Author.objects.create(
+            name="Ray Bradbury",
+            birth_date="1920-08-22",
+            nationality="American"
+        )
+        self.book = Book.objects.create(
+            title="Fahrenheit 451",
+            author=self.author,
+            publication_date="1953-10-19",
+            genre=Genre.objects.for_name("Dystopian")
+        )
+
+    def test_create_book_uses_cache(self):
+        """
+        Проверяет, что при повторной записи автор не запрашивается из базы.
+        """
+        author_cache.get(self.author.id)
+        data = {
+            "title": "The Martian Chronicles",
+            "author_id": str(self.author.id),
+            "publication_date": "1950-05-03",
+            "genre": "Science Fiction"
+        }
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('create-book'), data)
+
+        # При проверке автор берётся из кеша; в базе он проверяется один раз,
+        # внутри транзакции записи
+        self.assertEqual(len([q for q in queries if '"myapp_author"."id"' in q['sql']]), 1)
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['author'], "Ray Bradbury")
+        self.assertEqual(author_cache.stats()['misses'], 1)
+
+    def test_create_book_for_author_deleted_elsewhere(self):
+        """
+        Проверяет, что автор, удалённый в обход сигналов, даёт 400, а не ошибку базы.
+        """
+        author = Author.objects.create(name="Isaac Asimov")
+        self.assertTrue(author_cache.exists(author.id))
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM myapp_author WHERE id = %s", [author.id.hex])
+
+        response = self.client.post(reverse('create-book'), {"title": "Foundation", "author_id": str(author.id)})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['author_id'], ["Author with the provided ID does not exist."])
+        self.assertFalse(Book.objects.filter(title="Foundation").exists())
+        self.assertFalse(author_cache.exists(author.id))
+
+    def test_list_loads_authors_in_one_query(self):
+        """
+        Проверяет, что список книг разных авторов строится за два запроса.
+        """
+        for i in range(5):
+            author = Author.objects.create(name=f"Author {i}")
+            Book.objects.create(title=f"Book {i}", author=author)
+
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('list-books'))
+
+        self.assertEqual(len(response.data), 6)
+        self.assertEqual(author_cache.stats()['size'], 6)
+
+    def test_invalidated_on_save_and_delete(self):
+        """
+        Проверяет, что изменение и удаление автора сбрасывают запись в кеше.
+        """
+        self.assertEqual(author_cache.name(self.author.id), "Ray Bradbury")
+
+        self.author.name = "Ray Douglas Bradbury"
+        self.author.save()
+        response = self.client.get(reverse('book_detail', kwargs={'id': str(self.book.id)}))
+        self.assertEqual(response.data['author'], "Ray Douglas Bradbury")
+
+        author_id = self.author.id
+        self.author.delete()
+        self.assertFalse(author_cache.exists(author_id))
+
+    @override_settings(AUTHOR_CACHE_SIZE=2)
+    def test_prewarm_and_eviction(self):
+        """
+        Проверяет прогрев кеша и вытеснение самых старых записей.
+        """
+        other = Author.objects.create(name="Isaac Asimov")
+        author_cache.prewarm()
+
+        with self.assertNumQueries(0):
+            self.assertTrue(author_cache.exists(self.author.id))
+            self.assertTrue(author_cache.exists(other.id))
+
+        author_cache.get(Author.objects.create(name="Stanislaw Lem").id)
+        stats = author_cache.stats()
+        self.assertEqual(stats['size'], 2)
+        self.assertEqual(stats['hit_rate'], 2 / 3)
+
+
+class ChangesListViewTest(APITestCase):
+    """
+    Тесты для проверки журнала изменений GET /changes.
+    """
+
+    def setUp(self):
+        """
+        Настройка тестовых данных.
+        """
+        self.url = reverse('list-changes')
+        response = self.client.post(reverse('create-author'), {"name": "Ray Bradbury"})
+        self.author_id = response.data['data']['id']
+        response = self.client.post(reverse('create-book'), {
+            "title": "Fahrenheit 451",
+            "author_id": self.author_id,
+            "genre": "Dystopian"
+        })
+        self.book_id = response.data['id']
+
+    def test_changes_in_order(self):
+        """
+        Проверяет, что создание, изменение и каскадное удаление попадают в журнал по порядку.
+        """
+        self.client.put(reverse('update-book', kwargs={'id': self.book_id}), {
+            "title": "Fahrenheit 451 Updated",
+            "author_id": self.author_id,
+        })
+        self.client.delete(reverse('delete-author', kwargs={'id': self.author_id}))
+
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        changes = [
+            (change['entity'], str(change['object_id']), change['action'])
+            for change in response.data['results']
+        ]
+        self.assertEqual(changes, [
+            ('author', self.author_id, 'insert'),
+            ('book', self.book_id, 'insert'),
+            ('book', self.book_id, 'update'),
+            ('book', self.book_id, 'delete'),
+            ('author', self.author_id, 'delete'),
+        ])
+        self.assertEqual(response.data['results'][2]['data']['title'], "Fahrenheit 451 Updated")
+        self.assertIsNone(response.data['results'][3]['data'])
+        self.assertFalse(response.data['has_more'])
+
+    def test_changes_since_cursor(self):
+        """
+        Проверяет постраничное чтение журнала по курсору.
+        """
+        response = self.client.get(self.url, {'limit': 1})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertTrue(response.data['has_more'])
+
+        response = self.client.get(self.url, {'since': response.data['next_cursor']})
+        self.assertEqual([change['entity'] for change in response.data['results']], ['book'])
+
+        response = self.client.get(self.url, {'since': response.data['next_cursor']})
+        self.assertEqual(response.data['results'], [])
+
+    def test_invalid_cursor(self):
+        """
+        Проверяет, что некорректный курсор или размер страницы возвращает ошибку 400.
+        """
+        response = self.client.get(self.url, {'since': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        for limit in ['0', '-1']:
+            response = self.client.get(self.url, {'limit': limit})
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class AuthorIncludeBooksTest(APITestCase):
+    """
+    Тесты для проверки вложенного вывода книг авторов (?include=books).
+    """
+
+    def setUp(self):
+        """
+        Настройка тестовых данных.
+        """
+        self.authors = []
+        for i in range(3):
+            author = Author.objects.create(name=f"Author {i}")
+            for j in range(3):
+                Book.objects.create(title=f"Book {i}.{j}", author=author, publication_date=f"195{j}-01-01")
+            self.authors.append(author)
+
+    def test_list_with_books_in_two_queries(self):
+        """
+        Проверяет, что список авторов с книгами загружается ровно двумя запросами.
+        """
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('list-authors'), {'include': 'books'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(
+            [book['title'] for book in response.data[0]['books']],
+            ["Book 0.2", "Book 0.1", "Book 0.0"]
+        )
+
+    def test_list_without_include(self):
+        """
+        Проверяет, что без параметра include книги не выводятся.
+        """
+        response = self.client.get(reverse('list-authors'))
+        self.assertNotIn('books', response.data[0])
+
+    @override_settings(AUTHOR_BOOKS_INCLUDE_LIMIT=2)
+    def test_detail_with_books_limited(self):
+        """
+        Проверяет вывод книг одного автора с ограничением их числа.
+        """
+        url = reverse('author-detail', kwargs={'id': str(self.authors[1].id)})
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'include': 'books'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [book['title'] for book in response.data['books']],
+            ["Book 1.2", "Book 1.1"]
+        )
+
+
+class IdempotencyKeyTest(APITestCase):
+    """
+    Тесты для проверки повторов запросов с заголовком Idempotency-Key.
+    """
+
+    def setUp(self):
+        """
+        Настройка тестовых данных.
+        """
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.author = Author.objects.create(name="Ray Bradbury")
+        self.url = reverse('create-book')
+        self.data = {"title": "Fahrenheit 451", "author_id": str(self.author.id)}
+
+    def test_retry_replays_response(self):
+        """
+        Проверяет, что повтор возвращает исходный ответ без обращения к базе.
+        """
+        first = self.client.post(self.url, self.data, HTTP_IDEMPOTENCY_KEY="key-1")
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+
+        with self.assertNumQueries(0):
+            retry = self.client.post(self.url, self.data, HTTP_IDEMPOTENCY_KEY="key-1")
+
+        self.assertEqual(retry.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry['Idempotent-Replayed'], 'true')
+        self.assertEqual(Book.objects.count(), 1)
+
+    def test_key_reused_with_different_body(self):
+        """
+        Проверяет, что ключ нельзя использовать для другого запроса.
+        """
+        self.client.post(self.url, self.data, HTTP_IDEMPOTENCY_KEY="key-1")
+        response = self.client.post(
+            self.url, {**self.data, "title": "Dandelion Wine"}, HTTP_IDEMPOTENCY_KEY="key-1"
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_422_UNPROCESSABLE_ENTITY)
+        self.assertEqual(Book.objects.count(), 1)
+
+    def test_multipart_retry_with_new_boundary(self):
+        """
+        Проверяет, что повтор multipart-запроса с другой границей воспроизводится, а не получает 422.
+        """
+        responses = [
+            self.client.post(
+                self.url, encode_multipart(boundary, self.data),
+                content_type=f'multipart/form-data; boundary={boundary}', HTTP_IDEMPOTENCY_KEY="key-1"
+            )
+            for boundary in ("BoundaryFirstAttempt", "BoundarySecondAttempt")
+        ]
+
+        self.assertEqual(responses[0].status_code, status.HTTP_201_CREATED)
+        self.assertEqual(responses[1].status_code, status.HTTP_201_CREATED)
+        self.assertEqual(responses[1]['Idempotent-Replayed'], 'true')
+        self.assertEqual(Book.objects.count(), 1)
+
+    def test_keys_scoped_to_client(self):
+        """
+        Проверяет, что одинаковый ключ другого клиента не получает чужой ответ.
+        """
+        first = self.client.post(self.url, self.data, HTTP_IDEMPOTENCY_KEY="key-1")
+        other_user = self.client.post(
+            self.url, self.data, HTTP_IDEMPOTENCY_KEY="key-1",
+            HTTP_AUTHORIZATION=self.basic_auth("reader", "secret")
+        )
+        other_ip = self.client.post(self.url, self.data, HTTP_IDEMPOTENCY_KEY="key-1", REMOTE_ADDR="10.0.0.2")
+
+        self.assertEqual(first.status_code, status.HTTP_201_CREATED)
+        for response in (other_user, other_ip):
+            # Запрос выполняется заново и отклоняется как дубликат, а не воспроизводится
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertNotIn('Idempotent-Replayed', response)
+
+    def basic_auth(self, username, password):
+        User.objects.create_user(username, password=password)
+        return 'Basic ' + base64.b64encode(f"{username}:{password}".encode()).decode()
+
+    def test_delete_retry(self):
+        """
+        Проверяет, что повтор удаления возвращает исходный ответ вместо 404.
+        """
+        book = Book.objects.create(title="Fahrenheit 451", author=self.author)
+        url = reverse('delete-book', kwargs={'id': str(book.id)})
+
+        first = self.client.delete(url, HTTP_IDEMPOTENCY_KEY="key-2")
+        retry = self.client.delete(url, HTTP_IDEMPOTENCY_KEY="key-2")
+
+        self.assertEqual(first.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(retry.status_code, status.HTTP_204_NO_CONTENT)
+
+    @override_settings(WRITE_CONCURRENCY_LIMIT=0)
+    def test_shed_response_not_stored(self):
+        """
+        Проверяет, что отброшенный из-за нагрузки запрос можно повторить с тем же ключом.
+        """
+        response = self.client.post(self.url, self.data, HTTP_IDEMPOTENCY_KEY="key-3")
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+
+        with override_settings(WRITE_CONCURRENCY_LIMIT=None):
+            response = self.client.post(self.url, self.data, HTTP_IDEMPOTENCY_KEY="key-3")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+
+class StreamingListTest(APITestCase):
+    """
+    Тесты для проверки потоковой выдачи списков (?stream=1).
+    """
+
+    def setUp(self):
+        """
+        Настройка тестовых данных.
+        """
+        for i in range(5):
+            author = Author.objects.create(name=f"Author {i}")
+            Book.objects.create(title=f"Book {i}", author=author, publication_date=f"195{i}-01-01")
+
+    @override_settings(STREAMING_CHUNK_SIZE=2)
+    def test_stream_matches_regular_response(self):
+        """
+        Проверяет, что потоковый ответ совпадает с обычным списком.
+        """
+        for url, params in [
+            (reverse('list-books'), {'ordering': 'title'}),
+            (reverse('list-authors'), {'include': 'books'}),
+        ]:
+            with self.subTest(url=url):
+                regular = self.client.get(url, params)
+                response = self.client.get(url, {**params, 'stream': '1'})
+
+                self.assertTrue(response.streaming)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertEqual(json.loads(b''.join(response.streaming_content)), regular.json())
+
+    def test_stream_empty_list(self):
+        """
+        Проверяет потоковую выдачу пустого списка.
+        """
+        response = self.client.get(reverse('list-books'), {'stream': '1', 'genre': 'Poetry'})
+        self.assertEqual(b''.join(response.streaming_content), b'[]')
+
+
+def cache_add_and_incr(location, increments):
+    """Рабочий процесс теста SharedCacheTest: занимает ключ и увеличивает счётчик."""
+    shared = LockedFileBasedCache(location, {})
+    added = shared.add('idempotency', 'pending')
+    for _ in range(increments):
+        shared.incr('counter')
+    return added
+
+
+class SharedCacheTest(APITestCase):
+    """
+    Тесты для проверки согласованности кешей нескольких процессов через общий файловый кеш.
+    """
+
+    def setUp(self):
+        """
+        Настройка общего файлового кеша.
+        """
+        cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_dir.cleanup)
+        shared_settings = override_settings(
+            CACHES={'default': {
+                'BACKEND': 'myapp.cache.LockedFileBasedCache',
+                'LOCATION': cache_dir.name,
+            }},
+            AUTHOR_CACHE_SHARED_CACHE='default',
+        )
+        shared_settings.enable()
+        self.addCleanup(shared_settings.disable)
+        self.author = Author.objects.create(name="Ray Bradbury")
+
+    def test_author_cache_invalidated_in_other_process(self):
+        """
+        Проверяет, что изменение автора в одном процессе сбрасывает кеш другого.
+        """
+        # Кеши двух рабочих процессов
+        first, second = AuthorLookupCache(), AuthorLookupCache()
+        self.assertEqual(second.name(self.author.id), "Ray Bradbury")
+
+        Author.objects.filter(id=self.author.id).update(name="Ray Douglas Bradbury")
+        first.invalidate(self.author.id)
+
+        # Версия перечитывается со следующего запроса
+        self.assertEqual(second.name(self.author.id), "Ray Bradbury")
+        second.mark_shared_version_stale()
+        self.assertEqual(second.name(self.author.id), "Ray Douglas Bradbury")
+
+    def test_add_and_incr_atomic_across_processes(self):
+        """
+        Проверяет, что add() и incr() файлового кеша атомарны для нескольких процессов.
+        """
+        location = settings.CACHES['default']['LOCATION']
+        LockedFileBasedCache(location, {}).set('counter', 0)
+        with multiprocessing.get_context('fork').Pool(4) as pool:
+            added = pool.starmap(cache_add_and_incr, [(location, 50)] * 4)
+
+        self.assertEqual(sorted(added), [False, False, False, True])
+        self.assertEqual(LockedFileBasedCache(location, {}).get('counter'), 200)
+
+    def test_version_read_once_per_request(self):
+        """
+        Проверяет, что список книг читает версию из общего кеша один раз, а не для каждой книги.
+        """
+        for i in range(20):
+            Book.objects.create(title=f"Book {i}", author=self.author)
+        author_cache.clear()
+        self.addCleanup(author_cache.clear)
+        shared = caches['default']
+
+        with mock.patch.object(type(shared), 'get', autospec=True, side_effect=type(shared).get) as cache_get:
+            response = self.client.get(reverse('list-books'))
+
+        self.assertEqual(len(response.data), 20)
+        self.assertEqual(cache_get.call_count, 1)
+
+
+class GenreTest(APITestCase):
+    """
+    Тесты для проверки справочника жанров.
+    """
+
+    def setUp(self):
+        """
+        Настройка тестовых данных.
+        """
+        self.author = Author.objects.create(name="Ray Bradbury")
+        self.url = reverse('create-book')
+
+    def test_genre_variants_share_one_row(self):
+        """
+        Проверяет, что варианты написания жанра сводятся к одной записи Genre.
+        """
+        for title, genre in [("Fahrenheit 451", "Sci-Fi"), ("The Martian Chronicles", "sci fi")]:
+            response = self.client.post(self.url, {
+                "title": title, "author_id": str(self.author.id), "genre": genre
+            })
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        self.assertEqual(Genre.objects.count(), 1)
+        response = self.client.get(reverse('list-books'))
+        self.assertEqual({book['genre'] for book in response.data}, {"Sci-Fi"})
+
+    def test_invalid_request_does_not_create_genre(self):
+        """
+        Проверяет, что отклонённый запрос не добавляет жанр в справочник.
+        """
+        response = self.client.post(self.url, {
+            "title": "Fahrenheit 451", "author_id": "00000000-0000-0000-0000-000000000000", "genre": "Dystopian"
+        })
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Genre.objects.exists())
+
+    def test_filter_and_order_by_genre(self):
+        """
+        Проверяет фильтрацию по любому варианту названия и сортировку по названию жанра.
+        """
+        Book.objects.create(title="Dandelion Wine", author=self.author, genre=Genre.objects.for_name("Novel"))
+        Book.objects.create(title="Fahrenheit 451", author=self.author, genre=Genre.objects.for_name("Sci-Fi"))
+        Book.objects.create(title="Untitled", author=self.author)
+
+        response = self.client.get(reverse('list-books'), {'genre': "SCI FI"})
+        self.assertEqual([book['title'] for book in response.data], ["Fahrenheit 451"])
+
+        response = self.client.get(reverse('list-books'), {'genre': "Poetry"})
+        self.assertEqual(response.data, [])
+
+        response = self.client.get(reverse('list-books'), {'ordering': '-genre'})
+        self.assertEqual([book['genre'] for book in response.data][:2], ["Sci-Fi", "Novel"])
+
+
+
+@override_settings(WRITE_COALESCING=True, WRITE_COALESCING_BATCH_SIZE=5, WRITE_COALESCING_DELAY=0.5)
+class WriteCoalescingTest(APITransactionTestCase):
+    """
+    Тесты для проверки объединения записей в групповые транзакции.
+    Запись выполняется в отдельном потоке, поэтому данные тестов фиксируются в базе.
+    """
+
+    def setUp(self):
+        """
+        Настройка тестовых данных.
+        """
+        self.author = Author.objects.create(name="Ray Bradbury")
+        coalescer.reset_stats()
+        self.addCleanup(cache.clear)
+        self.addCleanup(author_cache.clear)
+
+    def post_book(self, title):
+        return APIClient().post(reverse('create-book'), {
+            "title": title, "author_id": str(self.author.id), "genre": "Sci-Fi"
+        })
+
+    def test_concurrent_creates_share_one_transaction(self):
+        """
+        Проверяет, что одновременные запросы фиксируются одной транзакцией вместе с журналом изменений.
+        """
+        titles = [f"Book {i}" for i in range(5)]
+        with ThreadPoolExecutor(len(titles)) as pool:
+            responses = list(pool.map(self.post_book, titles))
+
+        self.assertEqual([response.status_code for response in responses], [status.HTTP_201_CREATED] * 5)
+        self.assertEqual(coalescer.stats(), {'batches': 1, 'writes': 5})
+        self.assertEqual(sorted(Book.objects.values_list('title', flat=True)), titles)
+        self.assertEqual(ChangeLogEntry.objects.filter(entity=ChangeLogEntry.ENTITY_BOOK).count(), 5)
+
+    @override_settings(WRITE_COALESCING_DELAY=0)
+    def test_failed_write_does_not_affect_group(self):
+        """
+        Проверяет, что ошибка одной записи откатывает только её точку сохранения.
+        """
+        def failing_write():
+            Author.objects.create(name="Rolled back")
+            raise ValueError("write failed")
+
+        with self.assertRaises(ValueError):
+            coalescer.submit(failing_write)
+        response = self.client.post(reverse('create-author'), {"name": "Isaac Asimov"})
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertFalse(Author.objects.filter(name="Rolled back").exists())
+        self.assertTrue(Author.objects.filter(name="Isaac Asimov").exists())
+
+    @override_settings(WRITE_COALESCING_DELAY=0)
+    def test_batch_failure_does_not_stop_thread(self):
+        """
+        Проверяет, что сбой вне записей группы возвращает ошибку запросам, а поток продолжает работу.
+        """
+        with mock.patch.object(coalescer, '_commit', side_effect=RuntimeError("commit failed")):
+            with self.assertRaises(RuntimeError), self.assertLogs('myapp.coalescer', 'ERROR'):
+                coalescer.submit(lambda: None)
+
+        response = self.post_book("Fahrenheit 451")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    @override_settings(WRITE_COALESCING_DELAY=0, WRITE_COALESCING_TIMEOUT=0.2, WRITE_RETRY_AFTER=2)
+    def test_timeout_returns_503_and_cancels_write(self):
+        """
+        Проверяет, что запрос, не дождавшийся своей группы, получает 503, а его запись не выполняется.
+        """
+        release = threading.Event()
+        with ThreadPoolExecutor(1) as pool:
+            # Поток коалесцера занят медленной записью
+            slow = pool.submit(coalescer.submit, release.wait, 5)
+            response = self.post_book("Fahrenheit 451")
+            release.set()
+            slow.result()
+
+        self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        self.assertEqual(response['Retry-After'], '2')
+        self.assertEqual(coalescer.submit(Book.objects.count), 0)
+
+    @override_settings(WRITE_COALESCING_DELAY=0, WRITE_COALESCING_TIMEOUT=0.2, WRITE_RETRY_AFTER=2)
+    def test_timeout_of_started_write_returns_504_and_keeps_key(self):
+        """
+        Проверяет, что запрос, чья запись уже выполняется, получает 504 без Retry-After,
+        а его ключ идемпотентности остаётся занятым, и повтор не создаёт вторую книгу.
+        """
+        release = threading.Event()
+        save_and_record = BookCreateView.save_and_record
+
+        def slow_save_and_record(view, serializer):
+            release.wait(5)
+            return save_and_record(view, serializer)
+
+        client = APIClient()
+        data = {"title": "Fahrenheit 451", "author_id": str(self.author.id), "genre": "Sci-Fi"}
+        with mock.patch.object(BookCreateView, 'save_and_record', slow_save_and_record), \
+                self.assertLogs('myapp.coalescer', 'ERROR'):
+            response = client.post(reverse('create-book'), data, HTTP_IDEMPOTENCY_KEY='key-1')
+            retry = client.post(reverse('create-book'), data, HTTP_IDEMPOTENCY_KEY='key-1')
+            release.set()
+            # Следующая группа выполняется после группы с медленной записью
+            books = coalescer.submit(Book.objects.count)
+
+        self.assertEqual(response.status_code, status.HTTP_504_GATEWAY_TIMEOUT)
+        self.assertNotIn('Retry-After', response)
+        self.assertEqual(retry.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(books, 1)
+
+    @override_settings(WRITE_COALESCING=False)
+    def test_disabled_by_default(self):
+        """
+        Проверяет, что без WRITE_COALESCING запись выполняется в потоке запроса.
+        """
+        response = self.post_book("Fahrenheit 451")
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(coalescer.stats()['writes'], 0)
+
+
+class RequestProfilingTest(APITestCase):
+    """
+    Тесты для проверки профилирования отдельных запросов (?profile=1).
+    """
+
+    def setUp(self):
+        """
+        Настройка тестовых данных.
+        """
+        author = Author.objects.create(name="Ray Bradbury")
+        genre = Genre.objects.for_name("Sci-Fi")
+        for title in ["Fahrenheit 451", "The Martian Chronicles"]:
+            Book.objects.create(title=title, author=author, publication_date="1953-10-19", genre=genre)
+        self.staff = User.objects.create_user("admin", password="secret", is_staff=True)
+        self.url = reverse('list-books')
+        self.params = {'genre': 'sci-fi', 'ordering': 'author'}
+
+        profile_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(profile_dir.cleanup)
+        self.profile_dir = profile_dir.name
+        profile_settings = override_settings(PROFILE_DIR=self.profile_dir)
+        profile_settings.enable()
+        self.addCleanup(profile_settings.disable)
+
+    def server_timing(self, response):
+        return {metric.split(';')[0] for metric in response['Server-Timing'].split(', ')}
+
+    def test_profile_for_staff(self):
+        """
+        Проверяет разбивку по фазам в Server-Timing и сохранённый профиль стеков.
+        """
+        regular = self.client.get(self.url, self.params)
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(self.url, {**self.params, 'profile': '1'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), regular.json())
+        self.assertEqual(self.server_timing(response), {
+            'filter.DjangoFilterBackend', 'filter.OrderingFilter', 'db', 'serialize', 'render', 'other', 'total'
+        })
+
+        path = os.path.join(self.profile_dir, response['X-Profile-Id'])
+        with open(f'{path}.folded') as folded:
+            lines = folded.read().splitlines()
+        self.assertTrue(lines)
+        for line in lines:
+            stack, microseconds = line.rsplit(' ', 1)
+            self.assertTrue(stack)
+            self.assertGreater(int(microseconds), 0)
+        self.assertTrue(any('BookSerializer' in line for line in lines))
+
+        with open(f'{path}.json') as summary:
+            summary = json.load(summary)
+        self.assertEqual(summary['user'], 'admin')
+        self.assertGreater(summary['queries'], 0)
+        self.assertIsNone(sys.getprofile())
+
+    def test_timings_only_via_header(self):
+        """
+        Проверяет режим `X-Profile: timings`: разбивка без профиля стеков.
+        """
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(
+            reverse('book_detail', args=[Book.objects.first().id]), headers={'X-Profile': 'timings'}
+        )
+
+        self.assertIn('serialize', self.server_timing(response))
+        self.assertEqual(os.listdir(self.profile_dir), [f"{response['X-Profile-Id']}.json"])
+
+    @override_settings(PROFILE_MAX_COUNT=2)
+    def test_old_profiles_removed(self):
+        """
+        Проверяет, что в каталоге остаются только последние PROFILE_MAX_COUNT профилей.
+        """
+        self.client.force_authenticate(self.staff)
+        profile_ids = [
+            self.client.get(self.url, {'profile': '1'})['X-Profile-Id'] for _ in range(3)
+        ]
+
+        self.assertEqual(
+            sorted(os.listdir(self.profile_dir)),
+            sorted(f'{profile_id}.{extension}' for profile_id in profile_ids[1:] for extension in ('folded', 'json'))
+        )
+
+    def test_ignored_for_non_staff(self):
+        """
+        Проверяет, что без прав сотрудника и без параметра запрос не профилируется.
+        """
+        for user in [None, User.objects.create_user("reader", password="secret")]:
+            self.client.force_authenticate(user)
+            with mock.patch('myapp.profiling.PhaseTimer') as phase_timer:
+                response = self.client.get(self.url, {'profile': '1'})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('Server-Timing', response)
+            # Инструментирование не устанавливается вовсе
+            phase_timer.assert_not_called()
+
+        self.client.force_authenticate(self.staff)
+        response = self.client.get(self.url)
+        self.assertNotIn('Server-Timing', response)
+        self.assertEqual(os.listdir(self.profile_dir), [])
+
+# Базовые значения задержки представлений; обновляются запуском тестов
+# с переменной окружения UPDATE_PERF_BASELINE=1
+PERF_BASELINE_PATH = os.path.join(os.path.dirname(__file__), 'perf_baseline.json')
+# Допустимое замедление относительно базовых значений
+PERF_LATENCY_TOLERANCE = 3.0
+PERF_LATENCY_SLACK_MS = 10
+
+
+class QueryCountRegressionTest(APITestCase):
+    """
+    Проверяет, что число запросов к базе у всех представлений не зависит от объёма
+    данных, а задержка не превышает сохранённых базовых значений.
+    """
+    dataset_sizes = [5, 25, 100]    # Число авторов, у каждого по 3 книги
+    latency_runs = 5
+
+    def setUp(self):
+        """
+        Настройка тестовых данных.
+        """
+        self.addCleanup(cache.clear)
+        self.addCleanup(author_cache.clear)
+        self.authors_count = 0
+
+    def seed(self, authors_count):
+        """
+        Дополняет данные до указанного числа авторов.
+        """
+        authors = Author.objects.bulk_create([
+            Author(name=f"Author {i}", birth_date="1950-01-01")
+            for i in range(self.authors_count, authors_count)
+        ])
+        genres = [Genre.objects.for_name(f"Genre {i}") for i in range(5)]
+        books = Book.objects.bulk_create([
+            Book(title=f"Book {i}", author=author, publication_date="2000-01-01", genre=genres[i % 5])
+            for author in authors for i in range(3)
+        ])
+        ChangeLogEntry.objects.bulk_create([
+            ChangeLogEntry(entity=ChangeLogEntry.ENTITY_BOOK, object_id=book.id, action=ChangeLogEntry.ACTION_INSERT)
+            for book in books
+        ])
+        self.authors_count = authors_count
+
+    def victim_author(self):
+        author = Author.objects.create(name="Victim")
+        for i in range(3):
+            Book.objects.create(title=f"Victim book {i}", author=author)
+        return author
+
+    def endpoints(self):
+        """
+        Возвращает описание запросов ко всем представлениям:
+        имя -> функция, возвращающая (метод, url, данные).
+        """
+        author = Author.objects.order_by('name').first()
+        book = Book.objects.filter(author=author).first()
+        return {
+            'list-authors': lambda: ('get', reverse('list-authors'), None),
+            'list-authors-include-books': lambda: ('get', reverse('list-authors'), {'include': 'books'}),
+            'author-detail': lambda: ('get', reverse('author-detail', kwargs={'id': author.id}), None),
+            'author-detail-include-books': lambda: (
+                'get', reverse('author-detail', kwargs={'id': author.id}), {'include': 'books'}
+            ),
+            'list-books': lambda: ('get', reverse('list-books'), None),
+            'list-books-filtered': lambda: (
+                'get', reverse('list-books'), {'genre': "Genre 1", 'ordering': 'author'}
+            ),
+            'book-detail': lambda: ('get', reverse('book_detail', kwargs={'id': book.id}), None),
+            'list-changes': lambda: ('get', reverse('list-changes'), {'limit': 50}),
+            'create-author': lambda: ('post', reverse('create-author'), {
+                "name": f"New author {time.perf_counter_ns()}"
+            }),
+            'create-book': lambda: ('post', reverse('create-book'), {
+                "title": f"New book {time.perf_counter_ns()}", "author_id": str(author.id)
+            }),
+            'update-book': lambda: ('put', reverse('update-book', kwargs={'id': book.id}), {
+                "title": f"Updated {time.perf_counter_ns()}", "author_id": str(author.id)
+            }),
+            'delete-book': lambda: (
+                'delete', reverse('delete-book', kwargs={'id': Book.objects.create(title="Victim", author=author).id}), None
+            ),
+            'delete-author': lambda: (
+                'delete', reverse('delete-author', kwargs={'id': self.victim_author().id}), None
+            ),
+        }
+
+    def measure(self, make_request):
+        """
+        Выполняет запрос с холодными кешами и возвращает (число запросов, задержка в мс).
+        """
+        method, url, data = make_request()
+        cache.clear()
+        author_cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = getattr(self.client, method)(url, data)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+        self.assertLess(response.status_code, 400, f"{method.upper()} {url}: {response.status_code}")
+        return len(queries), elapsed_ms
+
+    def test_query_counts_and_latency(self):
+        """
+        Проверяет постоянство числа запросов и задержку на наборах данных разного размера.
+        """
+        query_counts = {}
+        latencies = {}
+        for size in self.dataset_sizes:
+            self.seed(size)
+            for name, make_request in self.endpoints().items():
+                runs = [self.measure(make_request) for _ in range(self.latency_runs)]
+                query_counts.setdefault(name, {})[size] = runs[0][0]
+                latencies[name, size] = statistics.median(elapsed_ms for _, elapsed_ms in runs)
+
+        for name, counts in query_counts.items():
+            with self.subTest(endpoint=name):
+                self.assertEqual(
+                    len(set(counts.values())), 1,
+                    f"Number of queries of '{name}' grows with row count: {counts}"
+                )
+
+        if os.environ.get('UPDATE_PERF_BASELINE'):
+            # Базовые значения хранятся по представлению и размеру набора данных:
+            # {"list-books": {"5": 3.1, "25": 6.4, "100": 18.9}, ...}
+            baseline = {}
+            for (name, size), ms in sorted(latencies.items()):
+                baseline.setdefault(name, {})[str(size)] = round(ms, 2)
+            with open(PERF_BASELINE_PATH, 'w') as baseline_file:
+                json.dump(baseline, baseline_file, indent=4)
+                baseline_file.write('\n')
+            return
+
+        with open(PERF_BASELINE_PATH) as baseline_file:
+            baseline = json.load(baseline_file)
+        for (name, size), elapsed_ms in latencies.items():
+            with self.subTest(endpoint=name, size=size):
+                expected_ms = baseline.get(name, {}).get(str(size))
+                self.assertIsNotNone(expected_ms, "No baseline, run the tests with UPDATE_PERF_BASELINE=1")
+                limit_ms = expected_ms * PERF_LATENCY_TOLERANCE + PERF_LATENCY_SLACK_MS
+                self.assertLessEqual(
+                    elapsed_ms, limit_ms,
+                    f"'{name}' on {size} authors took {elapsed_ms:.1f} ms, baseline {expected_ms} ms"
+                )
+
+
 # test
 # test 2
 # test 3
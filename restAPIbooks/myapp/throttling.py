@@ -0,0 +1,215 @@
+import logging
+import math
+import threading
+from collections import Counter
+from contextlib import nullcontext
+
+from django.conf import settings
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle, SimpleRateThrottle
+
+logger = logging.getLogger(__name__)
+
+# Счётчики отброшенных запросов (по причине), общие для всего процесса
+_shed_counters = Counter()
+_shed_lock = threading.Lock()
+
+
+def record_shed(reason):
+    """Учитывает отброшенный запрос в метриках процесса."""
+    with _shed_lock:
+        _shed_counters[reason] += 1
+
+
+def client_ident(request):
+    """Идентификатор клиента: пользователь, если он аутентифицирован, иначе IP."""
+    if request.user and request.user.is_authenticated:
+        return f'user:{request.user.pk}'
+    return f'ip:{BaseThrottle().get_ident(request)}'
+
+
+def authenticate_early(view, request, *args, **kwargs):
+    """
+    Создаёт запрос DRF и аутентифицирует клиента до dispatch представления.
+
+    Тот же запрос затем передаётся в dispatch, чтобы учётные данные не проверялись
+    дважды. При неверных учётных данных возвращает None: ответ с ошибкой вернёт
+    обычная обработка DRF.
+    """
+    drf_request = view.initialize_request(request, *args, **kwargs)
+    try:
+        drf_request.user
+    except APIException:
+        return None
+    view.initialize_request = lambda request, *args, **kwargs: drf_request
+    return drf_request
+
+
+def cache_exclusive(cache):
+    """Межпроцессная блокировка кеша, если бэкенд её даёт (myapp.cache.LockedFileBasedCache)."""
+    exclusive = getattr(cache, 'exclusive', None)
+    return exclusive() if exclusive is not None else nullcontext()
+
+
+def get_shed_stats():
+    """Возвращает копию счётчиков отброшенных запросов."""
+    with _shed_lock:
+        return dict(_shed_counters)
+
+
+def reset_shed_stats():
+    with _shed_lock:
+        _shed_counters.clear()
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """
+    Троттлинг по алгоритму token bucket.
+
+    Скорость задаётся так же, как в DRF ('30/min'): число запросов — это ёмкость
+    корзины, а токены восполняются равномерно в течение периода. Состояние
+    корзины (токены, время последнего пополнения) хранится в кеше по умолчанию.
+    """
+    cache_format = 'token_bucket_%(scope)s_%(ident)s'
+    # Чтение и запись состояния корзины в кеше не атомарны, поэтому внутри
+    # процесса обновление сериализуется блокировкой, а между процессами —
+    # блокировкой кеша, если он её поддерживает
+    lock = threading.Lock()
+
+    def get_rate(self):
+        # Читаем настройки при создании экземпляра, а не при импорте модуля
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        capacity = self.num_requests
+        refill_rate = self.num_requests / self.duration
+
+        with self.lock, cache_exclusive(self.cache):
+            now = self.timer()
+            tokens, updated_at = self.cache.get(self.key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated_at) * refill_rate)
+
+            if tokens < 1:
+                self.tokens_missing = 1 - tokens
+                self.refill_rate = refill_rate
+                self.cache.set(self.key, (tokens, now), self.duration)
+                return False
+
+            self.cache.set(self.key, (tokens - 1, now), self.duration)
+            return True
+
+    def wait(self):
+        """Через сколько секунд в корзине появится следующий токен."""
+        return self.tokens_missing / self.refill_rate
+
+
+class WriteClientThrottle(TokenBucketThrottle):
+    """Ограничение записи для отдельного клиента (по пользователю или IP)."""
+    scope = 'writes'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': client_ident(request)}
+
+
+class WriteGlobalThrottle(TokenBucketThrottle):
+    """Общее ограничение записи для всех клиентов."""
+    scope = 'writes_global'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': 'all'}
+
+
+class ServiceOverloaded(APIException):
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    default_detail = 'Too many concurrent write requests, please retry later.'
+    default_code = 'service_overloaded'
+
+    def __init__(self, wait, detail=None, code=None):
+        super().__init__(detail, code)
+        self.wait = wait
+
+
+class WriteConcurrencyLimiter:
+    """
+    Ограничивает число одновременно выполняемых запросов на запись в процессе.
+
+    Запросы сверх лимита не ждут блокировку SQLite, а сразу получают 503,
+    чтобы рабочие потоки оставались свободными для чтения.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def in_flight(self):
+        return self._in_flight
+
+    def try_acquire(self):
+        limit = settings.WRITE_CONCURRENCY_LIMIT
+        with self._lock:
+            if limit is not None and self._in_flight >= limit:
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self):
+        with self._lock:
+            self._in_flight -= 1
+
+
+write_limiter = WriteConcurrencyLimiter()
+
+
+class WriteLoadSheddingMixin:
+    """
+    Подключает к представлениям записи троттлинг и ограничение конкурентности.
+
+    Отброшенные запросы учитываются в счётчиках `get_shed_stats()`.
+    """
+    throttle_classes = [WriteClientThrottle, WriteGlobalThrottle]
+
+    def throttled(self, request, wait):
+        record_shed('throttled')
+        logger.warning("Write request throttled: %s %s", request.method, request.path)
+        super().throttled(request, wait)
+
+    def check_throttles(self, request):
+        # В отличие от DRF проверка останавливается на первом отказе: иначе запрос,
+        # отклонённый корзиной клиента, всё равно тратил бы токен общей корзины,
+        # и один клиент мог бы исчерпать её для всех
+        for throttle in self.get_throttles():
+            if not throttle.allow_request(request, self):
+                self.throttled(request, throttle.wait())
+
+    def dispatch(self, request, *args, **kwargs):
+        # Слот освобождается и тогда, когда DRF пробрасывает исключение
+        # (например, OperationalError: database is locked) мимо finalize_response
+        self._write_slot_acquired = False
+        try:
+            return super().dispatch(request, *args, **kwargs)
+        finally:
+            if self._write_slot_acquired:
+                self._write_slot_acquired = False
+                write_limiter.release()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if not write_limiter.try_acquire():
+            record_shed('overloaded')
+            logger.warning(
+                "Write request shed, %s writes in flight: %s %s",
+                write_limiter.in_flight, request.method, request.path
+            )
+            raise ServiceOverloaded(wait=math.ceil(settings.WRITE_RETRY_AFTER))
+        self._write_slot_acquired = True
@@ -0,0 +1,51 @@
+import os
+import re
+import threading
+import time
+import uuid
+
+_GENRE_SEPARATORS = re.compile(r'[\W_]+')
+
+_uuid7_lock = threading.Lock()
+_uuid7_last_ms = 0
+_uuid7_counter = 0
+
+
+def uuid7():
+    """
+    Генерирует UUID версии 7 (RFC 9562): 48 бит времени в миллисекундах,
+    12-битный счётчик и 62 случайных бита.
+
+    Ключи растут со временем, поэтому новые строки попадают в конец индекса
+    первичного ключа, а не в случайную страницу B-дерева. Счётчик сохраняет
+    порядок ключей, созданных в одну миллисекунду внутри процесса.
+    """
+    global _uuid7_last_ms, _uuid7_counter
+
+    with _uuid7_lock:
+        ms = time.time_ns() // 1_000_000
+        if ms > _uuid7_last_ms:
+            # Начинаем счётчик со случайного значения в нижней половине диапазона,
+            # оставляя место для последующих ключей этой миллисекунды
+            _uuid7_counter = int.from_bytes(os.urandom(2)) & 0x7FF
+        else:
+            ms = _uuid7_last_ms
+            _uuid7_counter += 1
+            if _uuid7_counter > 0xFFF:
+                # Счётчик переполнен — заимствуем следующую миллисекунду
+                ms += 1
+                _uuid7_counter = 0
+        _uuid7_last_ms = ms
+        counter = _uuid7_counter
+
+    rand_b = int.from_bytes(os.urandom(8)) & ((1 << 62) - 1)
+    value = (ms & ((1 << 48) - 1)) << 80 | 0x7 << 76 | counter << 64 | 0b10 << 62 | rand_b
+    return uuid.UUID(int=value)
+
+
+def normalize_genre(name):
+    """
+    Ключ жанра для сравнения вариантов написания:
+    'Sci-Fi', 'sci fi' и 'SCI_FI' дают 'scifi'.
+    """
+    return _GENRE_SEPARATORS.sub('', name.casefold())
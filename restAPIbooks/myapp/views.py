@@ -1,4 +1,7 @@
-﻿from django.shortcuts import render
+﻿from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.shortcuts import render
 from rest_framework.generics import CreateAPIView, ListAPIView, RetrieveAPIView, DestroyAPIView, UpdateAPIView
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import OrderingFilter
@@ -6,11 +9,23 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.exceptions import NotFound, ValidationError
 
-from myapp.models import Author, Book
-from myapp.serializers import AuthorSerializer, BookSerializer
+from myapp.changes import record_change, record_deletions
+from myapp.coalescer import run_coalesced
+from myapp.filters import BookFilter
+from myapp.idempotency import IdempotencyMixin
+from myapp.models import Author, Book, ChangeLogEntry
+from myapp.profiling import ProfilingMixin
+from myapp.serializers import (
+    AuthorSerializer,
+    AuthorWithBooksSerializer,
+    BookSerializer,
+    ChangeLogEntrySerializer
+)
+from myapp.streaming import StreamingListMixin
+from myapp.throttling import WriteLoadSheddingMixin
 
 # Create your views here.
-class AuthorCreateView(CreateAPIView):
+class AuthorCreateView(IdempotencyMixin, WriteLoadSheddingMixin, CreateAPIView):
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
 
@@ -33,8 +48,43 @@ class AuthorCreateView(CreateAPIView):
             status=status.HTTP_201_CREATED
         )
 
+    def perform_create(self, serializer):
+        run_coalesced(self.save_and_record, serializer)
 
-class AuthorsListView(ListAPIView):
+    def save_and_record(self, serializer):
+        super().perform_create(serializer)
+        record_change(
+            ChangeLogEntry.ENTITY_AUTHOR, serializer.instance.pk,
+            ChangeLogEntry.ACTION_INSERT, serializer.data
+        )
+
+
+class IncludeBooksMixin:
+    """
+    Поддержка параметра `?include=books`: книги авторов выводятся вложенным списком.
+
+    Книги загружаются одним дополнительным запросом (prefetch с IN по id авторов),
+    поэтому число запросов не зависит от числа авторов. Для каждого автора выводится
+    не больше AUTHOR_BOOKS_INCLUDE_LIMIT книг.
+    """
+
+    def include_books(self):
+        return 'books' in self.request.query_params.get('include', '').split(',')
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.include_books():
+            books = Book.objects.select_related('genre')[:settings.AUTHOR_BOOKS_INCLUDE_LIMIT]
+            queryset = queryset.prefetch_related(Prefetch('books', queryset=books, to_attr='included_books'))
+        return queryset
+
+    def get_serializer_class(self):
+        if self.include_books():
+            return AuthorWithBooksSerializer
+        return super().get_serializer_class()
+
+
+class AuthorsListView(ProfilingMixin, StreamingListMixin, IncludeBooksMixin, ListAPIView):
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
     filter_backends = [DjangoFilterBackend, OrderingFilter]
@@ -48,7 +98,7 @@ class AuthorsListView(ListAPIView):
         return queryset
 
 
-class AuthorDetailView(RetrieveAPIView):
+class AuthorDetailView(ProfilingMixin, IncludeBooksMixin, RetrieveAPIView):
     queryset = Author.objects.all()
     serializer_class = AuthorSerializer
     lookup_field = 'id'
@@ -68,7 +118,7 @@ class AuthorDetailView(RetrieveAPIView):
         return super().handle_exception(exc)
 
 
-class BookCreateView(CreateAPIView):
+class BookCreateView(IdempotencyMixin, WriteLoadSheddingMixin, CreateAPIView):
     queryset = Book.objects.all()
     serializer_class = BookSerializer
 
@@ -105,13 +155,22 @@ class BookCreateView(CreateAPIView):
             headers=headers,
         )
 
+    def perform_create(self, serializer):
+        run_coalesced(self.save_and_record, serializer)
 
+    def save_and_record(self, serializer):
+        super().perform_create(serializer)
+        record_change(
+            ChangeLogEntry.ENTITY_BOOK, serializer.instance.pk,
+            ChangeLogEntry.ACTION_INSERT, serializer.data
+        )
 
-class BooksListView(ListAPIView):
-    queryset = Book.objects.all().order_by('-publication_date', 'title')    # Сортировка по умолчанию
+
+class BooksListView(ProfilingMixin, StreamingListMixin, ListAPIView):
+    queryset = Book.objects.select_related('genre').order_by('-publication_date', 'title')    # Сортировка по умолчанию
     serializer_class = BookSerializer
     filter_backends = [DjangoFilterBackend, OrderingFilter]    # Подключение фильтрации и сортировки
-    filterset_fields = ['author', 'genre', 'publication_date']    # Поля для фильтрации
+    filterset_class = BookFilter    # Фильтрация по автору, жанру (по названию) и дате публикации
     ordering_fields = ['author', 'title', 'publication_date', 'genre']    # Поля для сортировки
     ordering = ['-publication_date', 'title']    # Сортировка по умолчанию
 
@@ -121,8 +180,8 @@ class BooksListView(ListAPIView):
         return queryset
 
 
-class BookDetailView(RetrieveAPIView):
-    queryset = Book.objects.all()
+class BookDetailView(ProfilingMixin, RetrieveAPIView):
+    queryset = Book.objects.select_related('genre')
     serializer_class = BookSerializer
     lookup_field = 'id'
 
@@ -138,7 +197,7 @@ class BookDetailView(RetrieveAPIView):
             raise NotFound({"detail": "Book with the specified ID not found"})
 
 
-class BookDeleteView(DestroyAPIView):
+class BookDeleteView(IdempotencyMixin, WriteLoadSheddingMixin, DestroyAPIView):
     queryset = Book.objects.all()
 
     def delete(self, request, *args, **kwargs):
@@ -148,15 +207,17 @@ class BookDeleteView(DestroyAPIView):
         except Book.DoesNotExist:
             raise NotFound({"detail": f"Book with ID '{book_id}' not found."})
 
-        # Удаляем книгу
-        book.delete()
+        # Удаляем книгу и записываем удаление в журнал изменений
+        with transaction.atomic():
+            book.delete()
+            record_deletions(ChangeLogEntry.ENTITY_BOOK, [book_id])
         return Response(
             {"message": f"Book with ID '{book_id}' deleted successfully."},
             status=status.HTTP_204_NO_CONTENT
         )
 
 
-class AuthorDeleteView(DestroyAPIView):
+class AuthorDeleteView(IdempotencyMixin, WriteLoadSheddingMixin, DestroyAPIView):
     queryset = Author.objects.all()
 
     def delete(self, request, *args, **kwargs):
@@ -166,16 +227,21 @@ class AuthorDeleteView(DestroyAPIView):
         except Author.DoesNotExist:
             raise NotFound({"detail": f"Author with id '{author_id} not found."})
 
-        # Удаляем автора (и связанные книги автоматически)
-        author.delete()
+        # Удаляем автора (и связанные книги автоматически),
+        # в журнал изменений записываем удаление и автора, и его книг
+        with transaction.atomic():
+            book_ids = list(author.books.values_list('id', flat=True))
+            author.delete()
+            record_deletions(ChangeLogEntry.ENTITY_BOOK, book_ids)
+            record_deletions(ChangeLogEntry.ENTITY_AUTHOR, [author_id])
         return Response(
             {"message": f"Author '{author}' and all author's books deleted successfully."},
             status=status.HTTP_204_NO_CONTENT
         )
 
 
-class BookUpdateView(UpdateAPIView):
-    queryset = Book.objects.all()
+class BookUpdateView(IdempotencyMixin, WriteLoadSheddingMixin, UpdateAPIView):
+    queryset = Book.objects.select_related('genre')
     serializer_class = BookSerializer
     lookup_field = 'id'  # Поле для поиска книги
 
@@ -201,5 +267,54 @@ class BookUpdateView(UpdateAPIView):
             status=status.HTTP_200_OK
         )
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            super().perform_update(serializer)
+            record_change(
+                ChangeLogEntry.ENTITY_BOOK, serializer.instance.pk,
+                ChangeLogEntry.ACTION_UPDATE, serializer.data
+            )
+
+
+class ChangesListView(ListAPIView):
+    """
+    Журнал изменений книг и авторов для инкрементальной синхронизации.
+
+    Возвращает записи с курсором больше `since` в порядке их появления.
+    Клиент сохраняет `next_cursor` и повторяет запрос, пока `has_more` истинно.
+    """
+    queryset = ChangeLogEntry.objects.all()
+    serializer_class = ChangeLogEntrySerializer
+
+    def get_int_param(self, name, default, minimum=0):
+        value = self.request.query_params.get(name, default)
+        try:
+            value = int(value)
+        except (TypeError, ValueError):
+            value = minimum - 1
+        if value < minimum:
+            kind = "positive" if minimum > 0 else "non-negative"
+            raise ValidationError({"detail": f"Parameter '{name}' must be a {kind} integer."})
+        return value
+
+    def list(self, request, *args, **kwargs):
+        since = self.get_int_param('since', 0)
+        # При limit=0 страница пуста, а курсор не двигается, и клиент зациклится
+        limit = min(
+            self.get_int_param('limit', settings.CHANGES_PAGE_SIZE, minimum=1), settings.CHANGES_MAX_PAGE_SIZE
+        )
+
+        # Берём на одну запись больше, чтобы узнать, есть ли следующая страница
+        entries = list(self.get_queryset().filter(id__gt=since).order_by('id')[:limit + 1])
+        has_more = len(entries) > limit
+        entries = entries[:limit]
+
+        serializer = self.get_serializer(entries, many=True)
+        return Response({
+            "results": serializer.data,
+            "next_cursor": entries[-1].id if entries else since,
+            "has_more": has_more,
+        })
+
 
 # test
\ No newline at end of file
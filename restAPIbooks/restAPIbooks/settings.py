@@ -43,10 +43,72 @@ INSTALLED_APPS = [
     'myapp',
 ]
 
+# Optional parts of the URL configuration. The API-only profile
+# (restAPIbooks.settings_api) disables both, so workers don't import them.
+ENABLE_ADMIN = True
+ENABLE_API_DOCS = True
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'rest_framework.schemas.coreapi.AutoSchema',
+    # Token bucket for write endpoints: per client and shared by all clients
+    'DEFAULT_THROTTLE_RATES': {
+        'writes': '120/min',
+        'writes_global': '1200/min',
+    },
 }
 
+# Load shedding for write endpoints: requests above this number of in-flight
+# writes per process are rejected with 503 and Retry-After (seconds).
+# None disables the limit.
+WRITE_CONCURRENCY_LIMIT = 8
+WRITE_RETRY_AFTER = 1
+
+# Opt-in write coalescing for POST /authors/create and /books/create: inserts from
+# concurrent requests are committed together in one transaction of up to
+# WRITE_COALESCING_BATCH_SIZE rows, waiting at most WRITE_COALESCING_DELAY seconds
+# for the group to fill. Batches per process cannot exceed WRITE_CONCURRENCY_LIMIT,
+# so raise it together with the batch size.
+WRITE_COALESCING = False
+WRITE_COALESCING_BATCH_SIZE = 64
+WRITE_COALESCING_DELAY = 0.005
+# Seconds a request waits for its group; after that it gets 503 with Retry-After
+WRITE_COALESCING_TIMEOUT = 10
+
+# Idempotency-Key support for write endpoints: responses are stored in the
+# IDEMPOTENCY_CACHE cache for IDEMPOTENCY_KEY_TTL seconds and replayed to retries.
+# IDEMPOTENCY_LOCK_TIMEOUT limits how long an in-progress key blocks retries.
+# Keys are scoped to the client (user or IP). The default LocMemCache is per
+# process, so with several workers (runprod) a retry that lands on another worker
+# runs again: point IDEMPOTENCY_CACHE to a cache shared by all workers with an
+# atomic add() (Redis, Memcached or the production profile's cache).
+IDEMPOTENCY_CACHE = 'default'
+IDEMPOTENCY_KEY_TTL = 24 * 60 * 60
+IDEMPOTENCY_LOCK_TIMEOUT = 60
+
+# In-process LRU cache of author id -> name used by book writes and rendering.
+# AUTHOR_CACHE_PREWARM loads up to AUTHOR_CACHE_SIZE authors at worker start.
+AUTHOR_CACHE_SIZE = 10000
+AUTHOR_CACHE_PREWARM = False
+# Cache alias shared by all workers, used to invalidate the author cache of
+# other processes (see settings_production). None keeps the cache per process.
+AUTHOR_CACHE_SHARED_CACHE = None
+
+# Maximum number of books nested into each author with ?include=books
+AUTHOR_BOOKS_INCLUDE_LIMIT = 100
+
+# Rows per chunk when list views stream their response (?stream=1)
+STREAMING_CHUNK_SIZE = 2000
+
+# Directory for request profiles taken with ?profile=1 by staff users
+# (<id>.folded stacks for flame graphs and <id>.json phase timings). None disables storing.
+PROFILE_DIR = BASE_DIR / 'profiles'
+# Only the newest PROFILE_MAX_COUNT profiles are kept
+PROFILE_MAX_COUNT = 100
+
+# Page sizes of the GET /changes change feed
+CHANGES_PAGE_SIZE = 500
+CHANGES_MAX_PAGE_SIZE = 5000
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -85,6 +147,23 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        'OPTIONS': {
+            # Write transactions take the write lock at BEGIN. With the default
+            # DEFERRED mode a transaction that reads before writing (e.g. the genre
+            # lookup before inserting a book) fails at once with "database is
+            # locked" when another connection is writing, instead of waiting.
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+}
+
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
     }
 }
 
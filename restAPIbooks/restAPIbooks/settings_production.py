@@ -0,0 +1,56 @@
+"""
+Production settings for restAPIbooks project.
+
+Extends the API-only profile (restAPIbooks.settings_api) for running several
+worker processes on one or more nodes:
+
+- the middleware stack is trimmed to what the JSON endpoints need: no sessions,
+  messages, authentication middleware, CSRF or clickjacking protection
+  (API views are CSRF-exempt and authenticate with HTTP Basic auth);
+- the default cache is a file-based cache in DJANGO_CACHE_DIR shared by the
+  worker processes. myapp.cache.LockedFileBasedCache makes add()/incr() and the
+  throttle token buckets atomic with flock, so throttles, stored idempotent
+  responses and author cache invalidations are coherent across the workers of
+  one node. flock is not reliable across nodes (e.g. on NFS): several nodes
+  need a cache with its own atomic operations, such as Redis or Memcached;
+- DJANGO_SECRET_KEY must be set, the development key is never used.
+
+Use it with DJANGO_SETTINGS_MODULE=restAPIbooks.settings_production.
+"""
+
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+from restAPIbooks.settings_api import *  # noqa: F401,F403
+from restAPIbooks.settings_api import BASE_DIR, DATABASES
+
+SECRET_KEY = os.environ.get('DJANGO_SECRET_KEY')
+if not SECRET_KEY:
+    raise ImproperlyConfigured("The DJANGO_SECRET_KEY environment variable must be set in production.")
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost,127.0.0.1').split(',')
+
+DATABASES['default']['NAME'] = os.environ.get('DJANGO_SQLITE_PATH', DATABASES['default']['NAME'])
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/#filesystem-caching
+
+CACHES = {
+    'default': {
+        'BACKEND': 'myapp.cache.LockedFileBasedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_DIR', BASE_DIR / 'cache'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 100000,
+        },
+    }
+}
+
+AUTHOR_CACHE_SHARED_CACHE = 'default'
@@ -14,11 +14,8 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
-from django.contrib import admin
+from django.conf import settings
 from django.urls import path
-from rest_framework import permissions
-from drf_yasg.views import get_schema_view
-from drf_yasg import openapi
 
 from myapp.views import \
     AuthorCreateView, \
@@ -29,24 +26,11 @@ from myapp.views import \
     BookDetailView, \
     BookDeleteView, \
     AuthorDeleteView, \
-    BookUpdateView
-
-
-schema_view = get_schema_view(
-    openapi.Info(
-        title="API Documentation",
-        default_version='v1',
-        description="API documentation",
-        # terms_of_service="https://www.example.com/terms/",
-        # contact=openapi.Contact(email="support@example.com"),
-        # license=openapi.License(name="BSD License"),
-    ),
-    public=True,
-    permission_classes=(permissions.AllowAny,),
-)
+    BookUpdateView, \
+    ChangesListView
+
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('authors/create', AuthorCreateView.as_view(), name='create-author'),
     path('authors/', AuthorsListView.as_view(), name='list-authors'),
     path('books/create', BookCreateView.as_view(), name='create-book'),
@@ -56,8 +40,35 @@ urlpatterns = [
     path('books/delete/<uuid:id>/', BookDeleteView.as_view(), name='delete-book'),
     path('authors/delete/<uuid:id>/', AuthorDeleteView.as_view(), name='delete-author'),
     path('books/update/<uuid:id>/', BookUpdateView.as_view(), name='update-book'),
-
-    path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
-    path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
-    path('openapi/', schema_view.without_ui(cache_timeout=0), name='schema-openapi-json'),
+    path('changes', ChangesListView.as_view(), name='list-changes'),
 ]
+
+# The admin and the API docs are routed (and imported) only where enabled
+if settings.ENABLE_ADMIN:
+    from django.contrib import admin
+
+    urlpatterns.append(path('admin/', admin.site.urls))
+
+if settings.ENABLE_API_DOCS:
+    from rest_framework import permissions
+    from drf_yasg.views import get_schema_view
+    from drf_yasg import openapi
+
+    schema_view = get_schema_view(
+        openapi.Info(
+            title="API Documentation",
+            default_version='v1',
+            description="API documentation",
+            # terms_of_service="https://www.example.com/terms/",
+            # contact=openapi.Contact(email="support@example.com"),
+            # license=openapi.License(name="BSD License"),
+        ),
+        public=True,
+        permission_classes=(permissions.AllowAny,),
+    )
+
+    urlpatterns += [
+        path('swagger/', schema_view.with_ui('swagger', cache_timeout=0), name='schema-swagger-ui'),
+        path('redoc/', schema_view.with_ui('redoc', cache_timeout=0), name='schema-redoc'),
+        path('openapi/', schema_view.without_ui(cache_timeout=0), name='schema-openapi-json'),
+    ]
@@ -14,3 +14,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'restAPIbooks.settings')
 
 application = get_wsgi_application()
+
+from myapp.author_cache import prewarm_author_cache  # noqa: E402
+
+prewarm_author_cache()